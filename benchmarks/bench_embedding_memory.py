@@ -0,0 +1,99 @@
+"""
+Benchmark: resident memory of src/tgt embeddings per storage dtype (Linux only).
+
+Each dtype runs in a fresh interpreter on synthetic normalized embeddings of
+shape (max_align-1, num_sents, dim) for both sides, stored with
+bertalign.quantize, then runs Bertalign.align_sents on them. Reports the
+embedding storage size, the process RSS while the aligner holds them, and
+the peak RSS during alignment (VmHWM, reset after numba compilation).
+
+    python benchmarks/bench_embedding_memory.py [--sents 10000] [--dim 768] [--max-align 5]
+"""
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DTYPES = ('float32', 'float16', 'int8')
+
+
+def status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+
+
+def make_aligner(num_sents, dim, max_align, dtype, seed):
+    from bertalign import Bertalign
+    from bertalign.corelib import SECOND_PASS_MEMORY_BUDGET
+    from bertalign.quantize import quantize
+    from bertalign.topk import check_engine
+
+    rng = np.random.default_rng(seed)
+    aligner = Bertalign.__new__(Bertalign)
+    for side in ('src', 'tgt'):
+        vecs = rng.standard_normal((max_align - 1, num_sents, dim), dtype=np.float32)
+        vecs /= np.linalg.norm(vecs, axis=-1, keepdims=True)
+        stored, scale = quantize(vecs, dtype)
+        del vecs
+        setattr(aligner, side + '_vecs', stored)
+        setattr(aligner, side + '_scale', scale)
+        setattr(aligner, side + '_lens', rng.integers(10, 200, (max_align - 1, num_sents)))
+    gc.collect()
+    aligner.src_num = aligner.tgt_num = num_sents
+    aligner.src_lang, aligner.tgt_lang = 'Chinese', 'Vietnamese'
+    aligner.max_align, aligner.top_k, aligner.win, aligner.skip = max_align, 3, 5, -0.1
+    aligner.margin = aligner.len_penalty = True
+    aligner.top_k_engine = check_engine('auto')
+    aligner.dp_memory_budget = SECOND_PASS_MEMORY_BUDGET
+    aligner.char_ratio = 1.0
+    return aligner
+
+
+def child(args):
+    import contextlib
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Compile the kernels for this dtype outside the measured region
+        make_aligner(50, args.dim, args.max_align, args.child, seed=1).align_sents()
+        aligner = make_aligner(args.sents, args.dim, args.max_align, args.child, seed=0)
+        held = status_mb('VmRSS')
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')     # reset VmHWM
+        aligner.align_sents()
+    print(json.dumps({'storage': (aligner.src_vecs.nbytes + aligner.tgt_vecs.nbytes) / 2**20,
+                      'held': held, 'peak': status_mb('VmHWM')}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, default=10000, help='Sentences per side')
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--max-align', type=int, default=5)
+    parser.add_argument('--child', choices=DTYPES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    print("{} sentences per side, dim {}, {} overlap layers".format(args.sents, args.dim, args.max_align - 1))
+    print("{:<8} {:>14} {:>12} {:>16}".format('dtype', 'embeddings MB', 'held RSS MB', 'align peak RSS MB'))
+    for dtype in DTYPES:
+        out = subprocess.run([sys.executable, __file__, '--child', dtype, '--sents', str(args.sents),
+                              '--dim', str(args.dim), '--max-align', str(args.max_align)],
+                             check=True, capture_output=True, text=True).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        print("{:<8} {:14.1f} {:12.1f} {:16.1f}".format(dtype, res['storage'], res['held'], res['peak']))
+
+
+if __name__ == '__main__':
+    main()
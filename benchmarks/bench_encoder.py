@@ -0,0 +1,80 @@
+"""
+Benchmark: Encoder.transform throughput (sentences/second) on CPU.
+
+Runs the same section through the encoder with fixed-size batches, with
+length-sorted token-budget batches, in composition mode (single sentences
+encoded, windows pooled) and, with --workers N, on a pool of N CPU encoding
+processes (embedding cache disabled).
+
+    python benchmarks/bench_encoder.py [sents.txt] [--max-align 6]
+        [--batch-size 64] [--token-budget 8192] [--workers 0] [--repeat 2]
+
+sents.txt holds one sentence per line (e.g. a QuocNgu section after
+norm_and_split_sents); without it a synthetic 500-sentence section is used.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bertalign import model
+
+
+def synthetic_sents(num_sents=500, seed=0):
+    rng = random.Random(seed)
+    words = ['người', 'ta', 'nói', 'rằng', 'Tôn', 'Ngộ', 'Không', 'đi', 'về', 'núi', 'Hoa', 'Quả',
+             'thầy', 'trò', 'Đường', 'Tăng', 'lên', 'đường', 'thỉnh', 'kinh', 'yêu', 'quái']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(3, 40))) + '.'
+            for _ in range(num_sents)]
+
+
+def run(sents, num_overlaps, repeat, **options):
+    model.configure(model_name=model.model_name, cache_dir=None, **options)
+    model.start_pool()
+    model.transform(sents[:8], num_overlaps)    # warm-up
+    model.reset_stats()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.transform(sents, num_overlaps)
+        best = min(best, time.perf_counter() - start)
+    model.stop_pool()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sents', nargs='?', type=Path, help='One sentence per line (default: synthetic)')
+    parser.add_argument('--max-align', type=int, default=6)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--token-budget', type=int, default=8192)
+    parser.add_argument('--workers', type=int, default=0, help='Also run on N encoding processes')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    sents = (args.sents.read_text(encoding='utf-8').splitlines() if args.sents else synthetic_sents())
+    num_overlaps = args.max_align - 1
+    model.preload()
+    print("Model: {} | {} sentences x {} overlap layers".format(model.model_name, len(sents), num_overlaps))
+
+    configs = {
+        'fixed batches': dict(batch_size=args.batch_size, token_budget=None),
+        'token budget': dict(batch_size=args.batch_size, token_budget=args.token_budget),
+        'compose': dict(batch_size=args.batch_size, token_budget=args.token_budget, compose_overlaps=True),
+    }
+    if args.workers > 1:
+        configs['{} workers'.format(args.workers)] = dict(
+            batch_size=args.batch_size, token_budget=args.token_budget, num_workers=args.workers)
+    for name, options in configs.items():
+        elapsed = run(sents, num_overlaps, args.repeat, **options)
+        print("{:<16} {:8.2f} s | {:8.1f} sents/s | {:8.1f} overlaps/s".format(
+            name, elapsed, len(sents) / elapsed, model.stats['encoded'] / args.repeat / elapsed))
+
+
+if __name__ == '__main__':
+    main()
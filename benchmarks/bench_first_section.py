@@ -0,0 +1,63 @@
+"""
+Benchmark: time to the first aligned section in a fresh interpreter,
+with an empty numba cache and after `python -m bertalign.warmup`.
+
+Each measurement runs in a new interpreter with its own NUMBA_CACHE_DIR
+and aligns one synthetic section (bench_pipeline_synthetic.synthetic_corpus)
+embedded by the hashing encoder, so it needs no model:
+  - cold:   empty cache, every kernel is compiled during the first section
+  - warmup: cache filled beforehand by `python -m bertalign.warmup --cache-dir`
+
+    python benchmarks/bench_first_section.py [--sents 500] [--dtype float32]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPET = """
+import time; t = time.perf_counter()
+import sys; sys.path.insert(0, 'benchmarks')
+from bench_pipeline_synthetic import synthetic_corpus, run
+from bertalign import model
+model.configure(model_name='synthetic', cache_dir=None, backend='hashing')
+imported = time.perf_counter()
+src, tgt, _ = synthetic_corpus({sents})
+aligner, encode_t, align_t = run(src, tgt, dict(vec_dtype='{dtype}'))
+print(imported - t, align_t, time.perf_counter() - t)
+"""
+
+
+def first_section(cache_dir, sents, dtype):
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    out = subprocess.run([sys.executable, "-c", SNIPPET.format(sents=sents, dtype=dtype)], cwd=ROOT,
+                         env=env, check=True, capture_output=True, text=True).stdout
+    return [float(x) for x in out.strip().splitlines()[-1].split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sents", type=int, default=500, help="Source sentences of the section")
+    parser.add_argument("--dtype", default="float32", help="Embedding dtype")
+    args = parser.parse_args()
+
+    print("{:<8} {:>10} {:>10} {:>12}".format("cache", "import s", "align s", "first sect s"))
+    with tempfile.TemporaryDirectory() as cold, tempfile.TemporaryDirectory() as warm:
+        print("{:<8} {:10.2f} {:10.2f} {:12.2f}".format("cold", *first_section(cold, args.sents, args.dtype)))
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "bertalign.warmup", "--cache-dir", warm], cwd=ROOT,
+                       check=True, capture_output=True)
+        warmup_t = time.perf_counter() - start
+        print("{:<8} {:10.2f} {:10.2f} {:12.2f}   (warmup run: {:.2f} s)".format(
+            "warmup", *first_section(warm, args.sents, args.dtype), warmup_t))
+
+
+if __name__ == "__main__":
+    main()
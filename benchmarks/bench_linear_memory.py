@@ -0,0 +1,81 @@
+"""
+Benchmark: full-table vs checkpointed-row (linear-memory) second pass.
+
+Same synthetic setup as bench_second_pass.py. For every size it runs
+corelib.second_pass_beads with the full DP table (no memory budget) and
+with second_pass_linear_beads (budget 0), and reports the estimated full
+table size, the peak memory allocated by the second pass (tracemalloc,
+which sees NumPy buffers), time, and whether both give the same beads.
+
+    python benchmarks/bench_linear_memory.py [--sents 10000 50000] [--dim 768]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline_synthetic import synthetic_corpus
+from bench_second_pass import second_pass_inputs
+from bertalign import Bertalign, model
+from bertalign.corelib import *
+
+
+def run(aligner, w, path, align_types, memory_budget):
+    args = (aligner.src_vecs, aligner.tgt_vecs, aligner.src_lens, aligner.tgt_lens, w, path,
+            align_types, aligner.char_ratio, aligner.skip)
+    options = dict(margin=aligner.margin, len_penalty=aligner.len_penalty,
+                   dot_scale=aligner.src_scale * aligner.tgt_scale, memory_budget=memory_budget)
+    tracemalloc.start()
+    start = time.perf_counter()
+    beads = second_pass_beads(*args, **options)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return beads, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[10000, 50000], help='Source sentences')
+    parser.add_argument('--dim', type=int, default=768, help='Hashing encoder dimension')
+    parser.add_argument('--max-align', type=int, default=5)
+    parser.add_argument('--win', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing',
+                    backend_options={'dim': args.dim})
+
+    def section(num_sents):
+        src, tgt, _ = synthetic_corpus(num_sents, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True,
+                                max_align=args.max_align, win=args.win)
+        return (aligner,) + second_pass_inputs(aligner)
+
+    for memory_budget in (None, 0):     # numba compilation
+        run(*section(100), memory_budget)
+
+    print("{:>8} {:>6} {:>10} {:>8} {:>10} {:>10} {:>6}".format(
+        'src', 'w', 'table MB', 'mode', 'peak MB', 'second s', 'same'))
+    for num_sents in args.sents:
+        aligner, w, path, align_types = section(num_sents)
+        table = second_pass_table_bytes(aligner.src_num, w, align_types)
+        full, full_t, full_peak = run(aligner, w, path, align_types, None)
+        linear, linear_t, linear_peak = run(aligner, w, path, align_types, 0)
+        same = np.array_equal(full, linear)
+        for mode, elapsed, peak in (('full', full_t, full_peak), ('linear', linear_t, linear_peak)):
+            print("{:8d} {:6d} {:10.1f} {:>8} {:10.1f} {:10.3f} {:>6}".format(
+                num_sents, w, table / 2**20, mode, peak / 2**20, elapsed, str(same)))
+
+
+if __name__ == '__main__':
+    main()
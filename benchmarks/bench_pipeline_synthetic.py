@@ -0,0 +1,108 @@
+"""
+Benchmark: end-to-end Bertalign on a synthetic parallel corpus, no model download.
+
+Generates a source "book" of pseudo-words and a noisy target side with known
+1-1, 1-2, 2-1, 1-0 and 0-1 beads, embeds both with the deterministic hashing
+encoder (bertalign.backends.HashingEncoder) and reports encoding time,
+alignment (top-k + both DP passes) time and F1 against the generated gold.
+
+    python benchmarks/bench_pipeline_synthetic.py [--sents 2000 10000] [--max-align 5]
+        [--win 5] [--top-k 3] [--dim 256] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bertalign import Bertalign, model
+from bertalign.eval import score_multiple
+
+
+def synthetic_corpus(num_sents, seed=0):
+    """Returns src sentences, tgt sentences and the gold beads [(src_ids, tgt_ids), ...]."""
+    rng = random.Random(seed)
+    syllables = ['ba', 'ca', 'da', 'ho', 'khi', 'lam', 'minh', 'ngo', 'phu', 'quan',
+                 'son', 'tam', 'thu', 'van', 'xuan', 'yen', 'dao', 'kinh', 'long', 'tang']
+    vocab = sorted({''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3))) for _ in range(3000)})
+
+    def sentence():
+        return [rng.choice(vocab) for _ in range(rng.randint(5, 25))]
+
+    def translate(words):
+        out = [w if rng.random() > 0.05 else rng.choice(vocab) for w in words if rng.random() > 0.1]
+        return ' '.join(out or words[:1]) + '.'
+
+    src_words = [sentence() for _ in range(num_sents)]
+    src = [' '.join(words) + '.' for words in src_words]
+    tgt, gold = [], []
+    i = 0
+    while i < num_sents:
+        r = rng.random()
+        if r < 0.02:
+            gold.append(([], [len(tgt)]))
+            tgt.append(translate(sentence()))
+            continue
+        if r < 0.07 and i + 1 < num_sents:
+            gold.append(([i, i + 1], [len(tgt)]))
+            tgt.append(translate(src_words[i] + src_words[i + 1]))
+            i += 2
+            continue
+        if r < 0.12 and len(src_words[i]) >= 10:
+            half = len(src_words[i]) // 2
+            gold.append(([i], [len(tgt), len(tgt) + 1]))
+            tgt.append(translate(src_words[i][:half]))
+            tgt.append(translate(src_words[i][half:]))
+        elif r < 0.14:
+            gold.append(([i], []))
+        else:
+            gold.append(([i], [len(tgt)]))
+            tgt.append(translate(src_words[i]))
+        i += 1
+    return src, tgt, gold
+
+
+def run(src, tgt, options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True, **options)
+        encoded = time.perf_counter()
+        aligner.align_sents()
+        aligned = time.perf_counter()
+    return aligner, encoded - start, aligned - encoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[2000, 10000], help='Source sentences')
+    parser.add_argument('--max-align', type=int, default=5)
+    parser.add_argument('--win', type=int, default=5)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--dim', type=int, default=256, help='Hashing encoder dimension')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing',
+                    backend_options={'dim': args.dim})
+    options = dict(max_align=args.max_align, top_k=args.top_k, win=args.win)
+
+    src, tgt, _ = synthetic_corpus(100, seed=args.seed)
+    run(src, tgt, options)      # numba compilation
+
+    print("{:>8} {:>8} {:>10} {:>10} {:>10} {:>9}".format('src', 'tgt', 'encode s', 'align s', 'F1 strict', 'F1 lax'))
+    for num_sents in args.sents:
+        src, tgt, gold = synthetic_corpus(num_sents, seed=args.seed)
+        aligner, encode_t, align_t = run(src, tgt, options)
+        scores = score_multiple(gold_list=[gold], test_list=[aligner.result])
+        print("{:8d} {:8d} {:10.2f} {:10.2f} {f1_strict:10.3f} {f1_lax:9.3f}".format(
+            len(src), len(tgt), encode_t, align_t, **scores))
+
+
+if __name__ == '__main__':
+    main()
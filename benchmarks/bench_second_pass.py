@@ -0,0 +1,85 @@
+"""
+Benchmark: second-pass DP throughput (band cells per second) on long sections.
+
+Embeds a synthetic corpus (see bench_pipeline_synthetic.py) with the hashing
+encoder at LaBSE's dimension, runs the first pass once, then times
+corelib.second_pass_align for every storage dtype, with and without the
+margin score. A cell is one (src, tgt) position inside the search path band.
+
+    python benchmarks/bench_second_pass.py [--sents 2000 5000 10000] [--dim 768]
+        [--dtypes float32 float16 int8] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline_synthetic import synthetic_corpus
+from bertalign import Bertalign, model
+from bertalign.corelib import *
+from bertalign.quantize import EMBEDDING_DTYPES, quantize
+
+
+def second_pass_inputs(aligner):
+    """First pass of Bertalign.align_sents; returns the second-pass window, path and types."""
+    _, first_path = find_first_search_path(aligner.src_num, aligner.tgt_num)
+    D, I = find_top_k_sents(aligner.src_vecs[0, :], aligner.tgt_vecs[0, :], k=aligner.top_k,
+                            engine=aligner.top_k_engine, search_path=first_path)
+    first_alignment = first_pass_sparse_align(aligner.src_num, aligner.tgt_num, first_path, D, I)
+    second_w, second_path = find_second_search_path(first_alignment, aligner.win,
+                                                    aligner.src_num, aligner.tgt_num)
+    return second_w, second_path, get_alignment_types(aligner.max_align)
+
+
+def time_second_pass(aligner, w, path, align_types, dtype, margin, repeat):
+    src_vecs, src_scale = quantize(aligner.src_vecs, dtype)
+    tgt_vecs, tgt_scale = quantize(aligner.tgt_vecs, dtype)
+    args = (src_vecs, tgt_vecs, aligner.src_lens, aligner.tgt_lens, w, path, align_types,
+            aligner.char_ratio, aligner.skip)
+    options = dict(margin=margin, len_penalty=aligner.len_penalty, dot_scale=src_scale * tgt_scale)
+    second_pass_align(*args, **options)     # numba compilation
+    start = time.perf_counter()
+    for _ in range(repeat):
+        second_pass_align(*args, **options)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[2000, 5000, 10000], help='Source sentences')
+    parser.add_argument('--dim', type=int, default=768, help='Hashing encoder dimension')
+    parser.add_argument('--dtypes', nargs='+', default=list(EMBEDDING_DTYPES), choices=EMBEDDING_DTYPES)
+    parser.add_argument('--max-align', type=int, default=5)
+    parser.add_argument('--win', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing',
+                    backend_options={'dim': args.dim})
+
+    print("{:>8} {:>6} {:>10} {:>8} {:>7} {:>10} {:>12}".format(
+        'src', 'w', 'cells', 'dtype', 'margin', 'second s', 'Mcells/s'))
+    for num_sents in args.sents:
+        src, tgt, _ = synthetic_corpus(num_sents, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True,
+                                max_align=args.max_align, win=args.win)
+        w, path, align_types = second_pass_inputs(aligner)
+        cells = int((path[:, 1] - path[:, 0] + 1).sum())
+        for dtype in args.dtypes:
+            for margin in (True, False):
+                elapsed = time_second_pass(aligner, w, path, align_types, dtype, margin, args.repeat)
+                print("{:8d} {:6d} {:10d} {:>8} {:>7} {:10.3f} {:12.2f}".format(
+                    num_sents, w, cells, dtype, str(margin), elapsed, cells / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
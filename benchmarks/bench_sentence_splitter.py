@@ -0,0 +1,84 @@
+"""
+Benchmark: QuocNgu sentence splitting per section.
+
+Compares the previous split/concatenate implementation with the single-scan
+QuocNguPreprocessor.split_sents and checks that both return the same sentences.
+
+    python benchmarks/bench_sentence_splitter.py [section.txt] [--repeat N]
+
+Without a section file a synthetic ~60k-character section is generated.
+"""
+
+import argparse
+import random
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from preprocessor import QuocNguPreprocessor
+from timing import best_of
+
+
+def legacy_split_sents(text):
+    if not text.strip():
+        return []
+    text = re.sub(r'\s+', ' ', text.strip())
+    sentence_endings = r'[.!?]+'
+    parts = re.split(f'({sentence_endings})', text)
+    result = []
+    current_sentence = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if re.match(f'^{sentence_endings}$', part):
+            current_sentence += part
+            if current_sentence.strip():
+                result.append(current_sentence.strip())
+            current_sentence = ""
+        else:
+            current_sentence += part
+    if current_sentence.strip():
+        result.append(current_sentence.strip())
+    return [s for s in result if len(s.strip()) > 2]
+
+
+def synthetic_section(num_sentences=1500, seed=0):
+    rng = random.Random(seed)
+    syllables = ['người', 'ta', 'nói', 'rằng', 'Tôn', 'Ngộ', 'Không', 'đi', 'về', 'núi', 'Hoa', 'Quả',
+                 'thầy', 'trò', 'Đường', 'Tăng', 'lên', 'đường', 'thỉnh', 'kinh', 'yêu', 'quái']
+    sentences = []
+    for _ in range(num_sentences):
+        words = [rng.choice(syllables) for _ in range(rng.randint(4, 18))]
+        if rng.random() < 0.3:
+            words.insert(rng.randint(1, len(words) - 1), rng.choice(syllables) + ',')
+        sentences.append(' '.join(words) + rng.choice(['.', '.', '.', '!', '?', '...']))
+    return ' '.join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('section', nargs='?', type=Path, help='Section text file (default: synthetic)')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    text = args.section.read_text(encoding='utf-8') if args.section else synthetic_section()
+    preprocessor = QuocNguPreprocessor(config_path=ROOT / 'quocngu_normalizer' / 'config_noise.json')
+
+    legacy_t, legacy = best_of(args.repeat, legacy_split_sents, text)
+    scan_t, scan = best_of(args.repeat, preprocessor.split_sents, text)
+    offsets_t, _ = best_of(args.repeat, preprocessor.split_sents_with_offsets, text)
+    assert legacy == scan, "sentence mismatch"
+
+    print(f"Section: {len(text):,} chars, {len(scan):,} sentences")
+    print(f"legacy split_sents:        {legacy_t * 1000:7.2f} ms")
+    print(f"single-scan split_sents:   {scan_t * 1000:7.2f} ms (x{legacy_t / scan_t:.1f})")
+    print(f"split_sents_with_offsets:  {offsets_t * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
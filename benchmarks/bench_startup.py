@@ -0,0 +1,45 @@
+"""
+Benchmark: CLI start-up cost of importing bertalign.
+
+Each measurement runs in a fresh interpreter:
+  - import bertalign.eval      (what eval_model.py needs for scoring only)
+  - import bertalign           (the aligner, without touching the model)
+  - first model.transform      (lazy model load + one tiny encode)
+
+    python benchmarks/bench_startup.py [--repeat N]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPETS = {
+    "import bertalign.eval": "import bertalign.eval",
+    "import bertalign": "import bertalign",
+    "first transform": "from bertalign import model; model.transform(['一', '二'], 1)",
+}
+
+
+def time_snippet(snippet):
+    code = ("import time; t = time.perf_counter(); {}; "
+            "print(time.perf_counter() - t)").format(snippet)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, snippet in SNIPPETS.items():
+        best = min(time_snippet(snippet) for _ in range(args.repeat))
+        print("{:<24} {:8.3f} s".format(name, best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: token validation and dictionary filtering in TextCleaner.
+
+Compares the previous per-token implementation (re.compile on every pattern
+access, one f-string regex per word) with the bulk single-pass version.
+
+    python benchmarks/bench_text_cleaner.py [chapter.txt] [--repeat N]
+
+Without a chapter file a synthetic chapter of ~20k tokens is generated from
+the bundled QuocNgu dictionary.
+"""
+
+import argparse
+import random
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from quocngu_normalizer.cleaning_config import CleaningConfig
+from quocngu_normalizer.text_cleaner import TextCleaner
+from timing import best_of
+
+DICT_PATH = Path(__file__).resolve().parent.parent / "quocngu_normalizer" / "QuocNgu_SinoNom_Dic.json"
+
+
+def synthetic_chapter(num_tokens=20000, seed=0):
+    cleaner = TextCleaner(dictionary_path=DICT_PATH)
+    words = list(cleaner.dictionary.words)
+    noise = ['@@', '#12', 'x~y', '|', '***', 'abc' * 20]
+    rng = random.Random(seed)
+    tokens = []
+    for _ in range(num_tokens):
+        r = rng.random()
+        if r < 0.08:
+            tokens.append(rng.choice(['.', ',', '!', '?', ':', '...']))
+        elif r < 0.11:
+            tokens.append(rng.choice(noise))
+        elif r < 0.14:
+            tokens.append(rng.choice(words).capitalize() + '_' + rng.choice(words))
+        else:
+            tokens.append(rng.choice(words) + rng.choice(['', '', '', ',', '.']))
+    return ' '.join(tokens)
+
+
+def legacy_filter_valid_tokens(config, tokens):
+    def valid_token_pattern():
+        return re.compile(rf'^[{config.VIETNAMESE_CHARS}{config.PUNCTUATION}]+$', re.UNICODE)
+
+    def punctuation_only_pattern():
+        return re.compile(rf'^[{config.PUNCTUATION}]+$', re.UNICODE)
+
+    valid = []
+    for token in tokens:
+        if not token or not (config.min_word_length <= len(token) <= config.max_word_length):
+            continue
+        if valid_token_pattern().match(token) or punctuation_only_pattern().match(token):
+            valid.append(token)
+    return valid
+
+
+def legacy_filter_by_dictionary(config, dictionary, text):
+    filtered = []
+    for word in text.split():
+        clean_word = re.sub(rf'^[{config.PUNCTUATION}]+|[{config.PUNCTUATION}]+$', '', word)
+        if (not clean_word or dictionary.contains(clean_word) or
+                re.compile(rf'^[{config.PUNCTUATION}]+$', re.UNICODE).match(word)):
+            filtered.append(word)
+    return ' '.join(filtered)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('chapter', nargs='?', type=Path, help='Chapter text file (default: synthetic)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = args.chapter.read_text(encoding='utf-8') if args.chapter else synthetic_chapter()
+    cleaner = TextCleaner(dictionary_path=DICT_PATH)
+    config = CleaningConfig()
+    tokens = text.split()
+    print(f"Chapter: {len(text):,} chars, {len(tokens):,} tokens")
+
+    legacy_t, legacy_valid = best_of(args.repeat, legacy_filter_valid_tokens, config, tokens)
+    bulk_t, bulk_valid = best_of(args.repeat, cleaner._filter_valid_tokens, tokens)
+    assert legacy_valid == bulk_valid, "token validation mismatch"
+    print(f"Token validation:   legacy {legacy_t * 1000:8.2f} ms | bulk {bulk_t * 1000:8.2f} ms "
+          f"| x{legacy_t / bulk_t:.1f}")
+
+    legacy_t, legacy_text = best_of(args.repeat, legacy_filter_by_dictionary, config, cleaner.dictionary, text)
+    bulk_t, bulk_text = best_of(args.repeat, cleaner._filter_by_dictionary, text)
+    assert legacy_text == bulk_text, "dictionary filter mismatch"
+    print(f"Dictionary filter:  legacy {legacy_t * 1000:8.2f} ms | bulk {bulk_t * 1000:8.2f} ms "
+          f"| x{legacy_t / bulk_t:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: first-pass top-k search engines (bertalign.topk).
+
+Embeds a synthetic corpus (see bench_pipeline_synthetic.py) with the hashing
+encoder and times find_top_k_sents with each engine. Quality is reported
+against the exact global search ("flat"): the recall of flat's candidates
+that fall inside the first-pass window, and the share of first-pass anchors
+(first_pass_sparse_align) that are the same.
+
+    python benchmarks/bench_top_k.py [--sents 2000 10000] [--dim 768] [--top-k 3]
+        [--engines band flat hnsw ivf]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline_synthetic import synthetic_corpus
+from bertalign import Bertalign, model
+from bertalign.corelib import find_first_search_path, find_top_k_sents, first_pass_sparse_align
+from bertalign.topk import TOP_K_ENGINES
+
+
+def in_window(I, path):
+    rows = np.arange(1, len(I) + 1)[:, None]
+    return (I >= 0) & (I + 1 >= path[rows, 0]) & (I + 1 <= path[rows, 1])
+
+
+def recall(I, ref_I, path):
+    """Share of the reference candidates inside the window that I also has."""
+    ref = in_window(ref_I, path)
+    found = (ref_I[:, :, None] == I[:, None, :]).any(axis=2)
+    return (found & ref).sum() / max(ref.sum(), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[2000, 10000], help='Source sentences')
+    parser.add_argument('--dim', type=int, default=768, help='Hashing encoder dimension')
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--engines', nargs='+', default=['band', 'flat', 'hnsw', 'ivf'],
+                        choices=TOP_K_ENGINES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing',
+                    backend_options={'dim': args.dim})
+
+    print("{:>8} {:>8} {:>10} {:>10} {:>10}".format('src', 'engine', 'top-k s', 'recall', 'anchors'))
+    for num_sents in args.sents:
+        src, tgt, _ = synthetic_corpus(num_sents, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True)
+        src_vecs, tgt_vecs = aligner.src_vecs[0], aligner.tgt_vecs[0]
+        n, m = aligner.src_num, aligner.tgt_num
+        _, path = find_first_search_path(n, m)
+
+        ref_D, ref_I = find_top_k_sents(src_vecs, tgt_vecs, k=args.top_k, engine='flat')
+        ref_anchors = set(map(tuple, first_pass_sparse_align(n, m, path, ref_D, ref_I).tolist()))
+        for engine in args.engines:
+            start = time.perf_counter()
+            D, I = find_top_k_sents(src_vecs, tgt_vecs, k=args.top_k, engine=engine, search_path=path)
+            elapsed = time.perf_counter() - start
+            anchors = set(map(tuple, first_pass_sparse_align(n, m, path, D, I).tolist()))
+            print("{:8d} {:>8} {:10.3f} {:10.4f} {:10.4f}".format(
+                num_sents, engine, elapsed, recall(I, ref_I, path),
+                len(anchors & ref_anchors) / max(len(ref_anchors), 1)))
+
+
+if __name__ == '__main__':
+    main()
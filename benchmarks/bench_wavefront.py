@@ -0,0 +1,77 @@
+"""
+Benchmark: sequential vs wavefront-parallel second-pass DP kernel on long sections.
+
+Embeds a synthetic corpus (see bench_pipeline_synthetic.py) with the hashing
+encoder and times the second-pass DP (scores precomputed) with the
+sequential and the wavefront kernel for each numba thread count, checking
+that the back-pointers are identical.
+
+    python benchmarks/bench_wavefront.py [--sents 10000 20000] [--threads 1 2 4]
+        [--win 5] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numba as nb
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline_synthetic import synthetic_corpus
+from bench_second_pass import second_pass_inputs
+from bertalign import Bertalign, model
+from bertalign.corelib import *
+
+
+def timed(func, repeat):
+    pointers = func()       # numba compilation
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat, pointers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[10000, 20000], help='Source sentences')
+    parser.add_argument('--threads', type=int, nargs='+', default=sorted({1, nb.config.NUMBA_NUM_THREADS}))
+    parser.add_argument('--dim', type=int, default=256, help='Hashing encoder dimension')
+    parser.add_argument('--win', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing',
+                    backend_options={'dim': args.dim})
+
+    print("{:>8} {:>8} {:>10} {:>12} {:>9} {:>6}".format(
+        'src', 'threads', 'cells', 'sequential s', 'wave s', 'same'))
+    for num_sents in args.sents:
+        src, tgt, _ = synthetic_corpus(num_sents, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True, win=args.win)
+        second_w, second_path, second_types = second_pass_inputs(aligner)
+        scores = second_pass_scores(aligner.src_vecs, aligner.tgt_vecs, aligner.src_lens, aligner.tgt_lens,
+                                    second_w, second_path, second_types, aligner.char_ratio, aligner.skip,
+                                    margin=aligner.margin, len_penalty=aligner.len_penalty)
+
+        cells = int((second_path[:, 1] - second_path[:, 0] + 1).sum())
+        for threads in args.threads:
+            nb.set_num_threads(threads)
+            sequential, pointers = timed(lambda: second_pass_dp(scores, second_path, second_types),
+                                         args.repeat)
+            wave, wave_pointers = timed(lambda: second_pass_dp_parallel(scores, second_path, second_types,
+                                                                        DP_TILE), args.repeat)
+            print("{:8d} {:8d} {:10d} {:12.3f} {:9.3f} {:>6}".format(
+                num_sents, threads, cells, sequential, wave, str(np.array_equal(pointers, wave_pointers))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Equivalence check: encoder backends and modes against the sentence-transformers (torch) backend.
+
+For every variant it reports encoding time of the golden-set sections
+(all overlap layers), the cosine similarity of each overlap vector to the
+torch vector, and the F1 of eval_model.evaluate on the Golden_CnVn set.
+--compose adds the composition mode (single sentences encoded, windows pooled).
+Cosine similarity is not reported for backends with another embedding size
+(e.g. a PCA-reduced static table).
+
+    python benchmarks/check_encoder_backend.py [--backends onnx onnx-int8 static]
+        [--compose] [--onnx-dir ./data/onnx/LaBSE] [--static-dir ./data/static/LaBSE]
+        [--num-overlaps 4]
+
+Export the ONNX model first with `python -m bertalign.onnx_backend LaBSE ./data/onnx/LaBSE`,
+and build the static table with `python -m bertalign.static_encoder`.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from config import GeneratorConfig
+from eval_model import create_eval_data_from_excel, evaluate
+from bertalign import model
+
+REFERENCE = 'sentence-transformers'
+EXCEL_PATH = Path('./data/Golden_CnVn_alignment/tqdn1_ch_vn.xlsx')
+EVAL_FOLDER = Path('./data/eval')
+
+
+def golden_sections():
+    return [(EVAL_FOLDER / side / file).read_text(encoding='utf-8').splitlines()
+            for side in ('chi', 'vie') for file in sorted(os.listdir(EVAL_FOLDER / side))]
+
+
+def configure(args, **options):
+    backend_options = {'model_dir': args.static_dir} if options['backend'] == 'static' else {}
+    options = dict(GeneratorConfig().encoder_options, cache_dir=None, num_workers=0,
+                   onnx_dir=args.onnx_dir, backend_options=backend_options, **options)
+    model.configure(**options)
+    model.preload()
+
+
+def encode(sections, num_overlaps):
+    """Encode every section like Bertalign does; returns all overlap vectors stacked."""
+    start = time.perf_counter()
+    vecs = []
+    for sents in sections:
+        sent_vecs = model.transform(sents, num_overlaps)[0]
+        vecs.append(sent_vecs.reshape(-1, sent_vecs.shape[-1]))
+    return np.concatenate(vecs).astype(np.float32), time.perf_counter() - start
+
+
+def cosine(a, b):
+    if a.shape != b.shape:
+        return np.full(len(a), np.nan)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.einsum('ij,ij->i', a, b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', nargs='*', default=['onnx', 'onnx-int8'])
+    parser.add_argument('--compose', action='store_true', help='Also check the composition mode')
+    parser.add_argument('--onnx-dir', default=GeneratorConfig().encoder_options['onnx_dir'])
+    parser.add_argument('--static-dir', default='./data/static/LaBSE')
+    parser.add_argument('--num-overlaps', type=int, default=4)
+    parser.add_argument('--no-f1', action='store_true', help='Skip the golden-set alignment')
+    args = parser.parse_args()
+
+    if not (EVAL_FOLDER / 'gold').exists():
+        create_eval_data_from_excel(EXCEL_PATH, EVAL_FOLDER)
+    sections = golden_sections()
+    num_sents = sum(len(sents) for sents in sections)
+    print("{} golden-set sentences, overlaps 1..{}".format(num_sents, args.num_overlaps))
+
+    variants = [(REFERENCE, dict(backend=REFERENCE))]
+    variants += [(b, dict(backend=b)) for b in args.backends if b != REFERENCE]
+    if args.compose:
+        variants.append((REFERENCE + ' + compose', dict(backend=REFERENCE, compose_overlaps=True)))
+
+    rows = []
+    ref_vecs = None
+    for name, options in variants:
+        configure(args, **options)
+        vecs, elapsed = encode(sections, args.num_overlaps)
+        if ref_vecs is None:
+            ref_vecs = vecs
+        cos = cosine(vecs, ref_vecs)
+        scores = None if args.no_f1 else evaluate(EVAL_FOLDER, max_align=args.num_overlaps + 1)
+        rows.append((name, elapsed, cos, scores))
+
+    print()
+    print("{:<32} {:>9} {:>10} {:>10} {:>10} {:>9} {:>9}".format(
+        'encoder', 'encode s', 'sents/s', 'mean cos', 'min cos', 'F1 strict', 'F1 lax'))
+    for name, elapsed, cos, scores in rows:
+        f1 = ('{f1_strict:9.3f} {f1_lax:9.3f}'.format(**scores) if scores else '{:>9} {:>9}'.format('-', '-'))
+        print("{:<32} {:9.2f} {:10.1f} {:10.4f} {:10.4f} {}".format(
+            name, elapsed, num_sents / elapsed, cos.mean(), cos.min(), f1))
+
+
+if __name__ == '__main__':
+    main()
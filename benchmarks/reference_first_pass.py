@@ -0,0 +1,176 @@
+"""
+Reference: the dense first-pass DP that first_pass_sparse_align replaced.
+
+Bertalign.align_sents finds the first-pass anchors with
+corelib.first_pass_sparse_align, a heaviest-chain search over the top-k
+cells. This module keeps the original DP over the whole first-pass band
+(first_pass_align + first_back_track) as the equivalence oracle: run it to
+check that both give the same anchors on synthetic sections.
+
+    python benchmarks/reference_first_pass.py [--sents 2000 10000] [--top-k 3] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numba as nb
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from bench_pipeline_synthetic import synthetic_corpus
+from bertalign import Bertalign, model
+from bertalign.corelib import (find_first_search_path, find_top_k_sents, first_pass_sparse_align,
+                               get_alignment_types)
+from bertalign.quantize import dequantize
+
+
+@nb.jit(nopython=True)
+def first_back_track(i, j, pointers, search_path, a_types):
+    """
+    Retrieve 1-1 alignments from the first-pass DP table.
+    Args:
+        i: int. Number of source sentences.
+        j: int. Number of target sentences.
+        pointers: numpy array. Backpointer matrix of first-pass alignment.
+        search_path: numpy array. First-pass search path.
+        a_types: numpy array. First-pass alignment types.
+    Returns:
+        alignment: numpy array of shape (num_anchors, 2), the (i, j) cells
+                   of the 1-1 alignments in order.
+    """
+    alignment = np.empty((min(i, j), 2), dtype=np.int64)
+    num_anchors = 0
+    while i > 0 or j > 0:
+        a = pointers[i][j - search_path[i][0]]
+        if a >= a_types.shape[0]:
+            raise ValueError("DP cell without a predecessor, the search path is disconnected")
+        if a == 2: # best 1-1 alignment
+            alignment[num_anchors, 0] = i
+            alignment[num_anchors, 1] = j
+            num_anchors += 1
+        i = i - a_types[a][0]
+        j = j - a_types[a][1]
+    return alignment[:num_anchors][::-1].copy()
+
+
+def first_pass_align(src_len,
+                     tgt_len,
+                     w,
+                     search_path,
+                     align_types,
+                     dist,
+                     index,
+                     ):
+    """
+    Perform the first-pass alignment to extract only 1-1 bitext segments.
+    Args:
+        src_len: int. Number of source sentences.
+        tgt_len: int. Number of target sentences.
+        w: int. Window size for the first-pass alignment.
+        search_path: numpy array. Search path for the first-pass alignment.
+        align_types: numpy array. Alignment types for the first-pass alignment.
+        dist: numpy array. Distance matrix for top-k similar vecs.
+        index: numpy array. Index matrix for top-k similar vecs.
+    Returns:
+        pointers: numpy array recording best alignments for each DP cell.
+    """
+    return first_pass_dp(src_len, w, search_path, align_types, dist, index)
+
+
+@nb.jit(nopython=True, fastmath=True)
+def first_pass_dp(src_len, w, search_path, align_types, dist, index):
+    # Initialize cost and backpointer matrix.
+    cost = np.zeros((src_len + 1, 2 * w + 1), dtype=nb.float32)
+    pointers = np.zeros((src_len + 1, 2 * w + 1), dtype=nb.uint8)
+
+    for i in range(src_len + 1):
+        for j in range(search_path[i][0], search_path[i][1] + 1):
+            if i + j > 0: # the origin stays zero
+                first_pass_cell(cost, pointers, search_path, align_types, dist, index, i, j)
+
+    return pointers
+
+
+@nb.jit(nopython=True, fastmath=True, inline='always')
+def first_pass_cell(cost, pointers, search_path, align_types, dist, index, i, j):
+    """
+    Fill DP cell (i, j) != (0, 0) of the first pass from its predecessors.
+    """
+    top_k = index.shape[1]
+    best_score = -np.inf
+    best_a = -1
+    for a in range(align_types.shape[0]):
+        a_1 = align_types[a][0]
+        a_2 = align_types[a][1]
+        prev_i = i - a_1
+        prev_j = j - a_2
+        if prev_i < 0 or prev_j < 0 :  # no previous cell 
+            continue
+        prev_i_start = search_path[prev_i][0]
+        prev_i_end =  search_path[prev_i][1]
+        if prev_j < prev_i_start or prev_j > prev_i_end: # out of bound of cost matrix
+            continue
+        prev_j_offset = prev_j - prev_i_start
+        score = cost[prev_i][prev_j_offset]
+        
+        # Extract the score for 1-1 bead from faiss.
+        if a_1 > 0 and a_2 > 0:
+            for k in range(top_k):
+                if index[i-1][k] == j - 1:
+                    score += dist[i-1][k]
+        if score > best_score:
+            best_score = score
+            best_a = a
+    
+    # Update cell(i, j) with the best score
+    # and rescord the trace history.
+    j_offset = j - search_path[i][0]
+    cost[i][j_offset] = best_score
+    pointers[i][j_offset] = best_a
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sents', type=int, nargs='+', default=[2000, 10000], help='Source sentences')
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model.configure(model_name='synthetic', cache_dir=None, backend='hashing')
+
+    print("{:>8} {:>8} {:>10} {:>9} {:>9} {:>6}".format('src', 'anchors', 'band', 'dense s', 'sparse s', 'same'))
+    for num_sents in args.sents:
+        src, tgt, _ = synthetic_corpus(num_sents, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aligner = Bertalign('\n'.join(src), '\n'.join(tgt), is_split=True, top_k=args.top_k)
+        n, m = aligner.src_num, aligner.tgt_num
+        first_w, first_path = find_first_search_path(n, m)
+        D, I = find_top_k_sents(dequantize(aligner.src_vecs[0, :], aligner.src_scale),
+                                dequantize(aligner.tgt_vecs[0, :], aligner.tgt_scale), k=aligner.top_k,
+                                engine=aligner.top_k_engine, search_path=first_path)
+        first_types = get_alignment_types(2)
+        first_back_track(n, m, first_pass_align(n, m, first_w, first_path, first_types, D, I),
+                         first_path, first_types)      # numba compilation
+        first_pass_sparse_align(n, m, first_path, D, I)
+
+        start = time.perf_counter()
+        pointers = first_pass_align(n, m, first_w, first_path, first_types, D, I)
+        dense = first_back_track(n, m, pointers, first_path, first_types)
+        dense_t = time.perf_counter() - start
+        start = time.perf_counter()
+        sparse = first_pass_sparse_align(n, m, first_path, D, I)
+        sparse_t = time.perf_counter() - start
+        print("{:8d} {:8d} {:10d} {:9.3f} {:9.3f} {:>6}".format(
+            num_sents, len(sparse), int((first_path[:, 1] - first_path[:, 0] + 1).sum()),
+            dense_t, sparse_t, str(np.array_equal(dense, sparse))))
+
+
+if __name__ == '__main__':
+    main()
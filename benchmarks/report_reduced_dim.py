@@ -0,0 +1,99 @@
+"""
+Report: reduced-dimension embeddings, alignment time vs. golden-set F1.
+
+Aligns the Golden_CnVn set with the full embeddings and with embeddings
+reduced by PCA fitted per section, PCA fitted once on the whole golden set
+("book") and Matryoshka-style truncation. Encoding is shared through the
+embedding cache, so the timings cover top-k search and both DP passes only.
+
+    python benchmarks/report_reduced_dim.py [--dims 256 128 64] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from config import GeneratorConfig
+from eval_model import create_eval_data_from_excel
+from bertalign import Bertalign, model
+from bertalign.eval import read_alignments, score_multiple
+from bertalign.projection import PCAProjection
+
+EXCEL_PATH = Path('./data/Golden_CnVn_alignment/tqdn1_ch_vn.xlsx')
+EVAL_FOLDER = Path('./data/eval')
+
+
+def load_golden():
+    files = []
+    for file in sorted(os.listdir(EVAL_FOLDER / 'chi')):
+        src = (EVAL_FOLDER / 'chi' / file).read_text(encoding='utf-8')
+        tgt = (EVAL_FOLDER / 'vie' / file).read_text(encoding='utf-8')
+        files.append((src, tgt, read_alignments(EVAL_FOLDER / 'gold' / file)))
+    return files
+
+
+def fit_book_pca(files, dim):
+    with contextlib.redirect_stdout(io.StringIO()):
+        vecs = [model.transform(text.splitlines(), 1)[0][0]
+                for src, tgt, _ in files for text in (src, tgt)]
+    return PCAProjection.fit(np.concatenate(vecs), dim)
+
+
+def run(files, repeat, **options):
+    """Returns (best total align_sents seconds, scores)."""
+    aligners = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for src, tgt, _ in files:
+            aligners.append(Bertalign(src, tgt, is_split=True, **options))
+        aligners[0].align_sents()     # numba compilation for this dtype/shape
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for aligner in aligners:
+                aligner.align_sents()
+            best = min(best, time.perf_counter() - start)
+
+    scores = score_multiple(gold_list=[gold for _, _, gold in files],
+                            test_list=[aligner.result for aligner in aligners])
+    return best, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dims', type=int, nargs='+', default=[256, 128, 64])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not (EVAL_FOLDER / 'gold').exists():
+        create_eval_data_from_excel(EXCEL_PATH, EVAL_FOLDER)
+    model.configure(**GeneratorConfig().encoder_options)
+    files = load_golden()
+
+    configs = [('full', dict())]
+    for dim in args.dims:
+        configs.append(('pca {} (section)'.format(dim), dict(dim=dim, projection='pca')))
+        configs.append(('pca {} (book)'.format(dim), dict(dim=dim, projection=fit_book_pca(files, dim))))
+        configs.append(('truncate {}'.format(dim), dict(dim=dim, projection='truncate')))
+
+    print("{:<22} {:>10} {:>8} {:>10} {:>9}".format('embeddings', 'align s', 'speedup', 'F1 strict', 'F1 lax'))
+    base = None
+    for name, options in configs:
+        elapsed, scores = run(files, args.repeat, **options)
+        base = base or elapsed
+        print("{:<22} {:10.3f} {:7.2f}x {f1_strict:10.3f} {f1_lax:9.3f}".format(
+            name, elapsed, base / elapsed, **scores))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Smoke run: every benchmark script on a tiny input.
+
+Runs each script in benchmarks/ in a fresh interpreter with arguments small
+enough to finish in seconds, so that API changes which break a script (a
+renamed kernel, a new Bertalign attribute) show up before the next real
+benchmark run. Scripts whose optional dependencies are not installed are
+skipped. A few regression checks (CHECKS) run the same way. Exits non-zero
+if any of them fails.
+
+    python benchmarks/smoke.py [name ...]
+"""
+
+import argparse
+import importlib.util
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# script -> (tiny arguments, modules it needs beyond the base install)
+SCRIPTS = {
+    'bench_embedding_memory': (['--sents', '300', '--dim', '64'], []),
+    'bench_encoder': (['--repeat', '1'], ['sentence_transformers']),
+    'bench_first_section': (['--sents', '100'], []),
+    'bench_linear_memory': (['--sents', '300', '--dim', '64'], []),
+    'bench_pipeline_synthetic': (['--sents', '300'], []),
+    'bench_second_pass': (['--sents', '300', '--dim', '64', '--repeat', '1'], []),
+    'bench_sentence_splitter': (['--repeat', '1'], []),
+    'bench_startup': (['--repeat', '1'], ['sentence_transformers']),
+    'bench_text_cleaner': (['--repeat', '1'], []),
+    'bench_top_k': (['--sents', '300', '--dim', '64'], ['faiss']),
+    'bench_wavefront': (['--sents', '300', '--repeat', '1'], []),
+    'check_encoder_backend': (['--backends', 'static'], ['sentence_transformers', 'pandas']),
+    'reference_first_pass': (['--sents', '300'], []),
+    'report_reduced_dim': (['--dims', '64', '--repeat', '1'], ['sentence_transformers', 'pandas']),
+}
+
+# Regression checks, run with `python -c`. REPEATED_WINDOWS encodes a section
+# whose later chunks hold only windows already seen in earlier chunks, on a
+# backend with a tokenizer (the Encoder path that batches token ids).
+REPEATED_WINDOWS = """
+import tempfile
+import numpy as np
+from bertalign.backends import register_backend
+from bertalign.encoder import Encoder
+
+@register_backend('words')
+class Words:
+    supports_pool = False
+    max_seq_length = 64
+    pad_token_id = 0
+
+    def __init__(self, model_name):
+        self.tokenizer = self
+        self.vocab = {}
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [[self.vocab.setdefault(w, len(self.vocab) + 1) for w in text.split()]
+                              for text in texts]}
+
+    def num_special_tokens_to_add(self):
+        return 0
+
+    def build_inputs_with_special_tokens(self, ids):
+        return list(ids)
+
+    def forward(self, input_ids, attention_mask):
+        vecs = np.zeros((len(input_ids), 8), dtype=np.float32)
+        for row, (ids, mask) in enumerate(zip(input_ids, attention_mask)):
+            np.add.at(vecs[row], ids[mask > 0] % 8, 1)
+        return vecs
+
+sents = ['a'] * 10
+expected = Encoder('words', backend='words').transform(sents, 2)[0]
+for cache_dir in (None, tempfile.mkdtemp()):
+    encoder = Encoder('words', cache_dir=cache_dir, backend='words', chunk_size=4)
+    assert np.array_equal(encoder.transform(sents, 2)[0], expected)
+    assert encoder._encode_unique([]).shape == (0, 8)
+"""
+
+CHECKS = {
+    'repeated_windows': REPEATED_WINDOWS,
+}
+
+
+def missing_modules(modules):
+    return [name for name in modules if importlib.util.find_spec(name) is None]
+
+
+def run(argv):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + argv, cwd=ROOT, capture_output=True, text=True)
+    return proc, time.perf_counter() - start
+
+
+def report(name, proc, elapsed):
+    if proc.returncode == 0:
+        print("{:<26} ok      {:6.1f} s".format(name, elapsed))
+        return True
+    print("{:<26} FAILED  {:6.1f} s".format(name, elapsed))
+    print('\n'.join('    ' + line for line in proc.stderr.strip().splitlines()[-10:]))
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('names', nargs='*', metavar='name', help='Scripts or checks to run (default: all)')
+    args = parser.parse_args()
+    known = sorted(SCRIPTS) + sorted(CHECKS)
+    unknown = sorted(set(args.names) - set(known))
+    if unknown:
+        parser.error('unknown name(s): {} (choose from {})'.format(', '.join(unknown), ', '.join(known)))
+
+    failed = []
+    for name in args.names or known:
+        if name in CHECKS:
+            argv = ['-c', CHECKS[name]]
+        else:
+            script_args, modules = SCRIPTS[name]
+            missing = missing_modules(modules)
+            if missing:
+                print("{:<26} skipped (missing {})".format(name, ', '.join(missing)))
+                continue
+            argv = [str(ROOT / 'benchmarks' / (name + '.py'))] + script_args
+        if not report(name, *run(argv)):
+            failed.append(name)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""Timing helpers shared by the benchmark scripts."""
+
+import time
+
+
+def best_of(repeat, fn, *args):
+    """Call fn(*args) repeat times; return the fastest wall time (s) and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
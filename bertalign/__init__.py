@@ -10,6 +10,9 @@ from bertalign.encoder import Encoder
 # See other cross-lingual embedding models at
 # https://www.sbert.net/docs/pretrained_models.html
 
+# The model is loaded lazily on the first transform (or on model.preload()).
+# Use model.configure(model_name=..., cache_dir=..., ...) to select another model; options
+# not passed are reset to their defaults (see Encoder.configure).
 model_name = "LaBSE"
 model = Encoder(model_name)
 
@@ -2,6 +2,9 @@ import numpy as np
 
 from bertalign import model
 from bertalign.corelib import *
+from bertalign.projection import reduce_dim
+from bertalign.quantize import quantize, dequantize
+from bertalign.topk import check_engine
 from bertalign.utils import *
 
 class Bertalign:
@@ -15,14 +18,21 @@ class Bertalign:
                  margin=True,
                  len_penalty=True,
                  is_split=False,
+                 dim=None,
+                 projection="pca",
+                 vec_dtype="float32",
+                 top_k_engine="auto",
+                 dp_memory_budget=SECOND_PASS_MEMORY_BUDGET,
                ):
         
         self.max_align = max_align
         self.top_k = top_k
+        self.top_k_engine = check_engine(top_k_engine)
         self.win = win
         self.skip = skip
         self.margin = margin
         self.len_penalty = len_penalty
+        self.dp_memory_budget = dp_memory_budget
         
         src = clean_text(src)
         tgt = clean_text(tgt)
@@ -48,8 +58,23 @@ class Bertalign:
         print("Target language: {}, Number of sentences: {}".format(tgt_lang, tgt_num))
 
         print("Embedding source and target text using {} ...".format(model.model_name))
-        src_vecs, src_lens = model.transform(src_sents, max_align - 1)
-        tgt_vecs, tgt_lens = model.transform(tgt_sents, max_align - 1)
+        model.reset_stats()
+        # float16 storage can be written by the encoder directly, without a float32 copy
+        encode_dtype = np.float16 if vec_dtype == "float16" and not dim else np.float32
+        src_vecs, src_lens = model.transform(src_sents, max_align - 1, dtype=encode_dtype)
+        tgt_vecs, tgt_lens = model.transform(tgt_sents, max_align - 1, dtype=encode_dtype)
+        stats = model.stats
+        print("Encoded {} of {} overlaps ({} unique, {} forward passes saved)".format(
+            stats["encoded"], stats["overlaps"], stats["unique"], stats["overlaps"] - stats["encoded"]))
+
+        if dim and dim < src_vecs.shape[-1]:
+            # Smaller vectors make every dot product in top-k search and DP cheaper
+            print("Reducing embeddings from {} to {} dimensions ...".format(src_vecs.shape[-1], dim))
+            src_vecs, tgt_vecs = reduce_dim(src_vecs, tgt_vecs, dim, projection)
+
+        # Embeddings live as long as the aligner: keep them in the storage dtype
+        src_vecs, src_scale = quantize(src_vecs, vec_dtype)
+        tgt_vecs, tgt_scale = quantize(tgt_vecs, vec_dtype)
 
         char_ratio = np.sum(src_lens[0,]) / np.sum(tgt_lens[0,])
 
@@ -64,26 +89,32 @@ class Bertalign:
         self.char_ratio = char_ratio
         self.src_vecs = src_vecs
         self.tgt_vecs = tgt_vecs
+        self.src_scale = src_scale
+        self.tgt_scale = tgt_scale
         
     def align_sents(self):
 
         print("Performing first-step alignment ...")
-        D, I = find_top_k_sents(self.src_vecs[0,:], self.tgt_vecs[0,:], k=self.top_k)
-        first_alignment_types = get_alignment_types(2) # 0-1, 1-0, 1-1
-        first_w, first_path = find_first_search_path(self.src_num, self.tgt_num)
-        first_pointers = first_pass_align(self.src_num, self.tgt_num, first_w, first_path, first_alignment_types, D, I)
-        first_alignment = first_back_track(self.src_num, self.tgt_num, first_pointers, first_path, first_alignment_types)
+        _, first_path = find_first_search_path(self.src_num, self.tgt_num)
+        D, I = find_top_k_sents(dequantize(self.src_vecs[0,:], self.src_scale),
+                                dequantize(self.tgt_vecs[0,:], self.tgt_scale), k=self.top_k,
+                                engine=self.top_k_engine, search_path=first_path)
+        first_alignment = first_pass_sparse_align(self.src_num, self.tgt_num, first_path, D, I)
         
         print("Performing second-step alignment ...")
         second_alignment_types = get_alignment_types(self.max_align)
         second_w, second_path = find_second_search_path(first_alignment, self.win, self.src_num, self.tgt_num)
-        second_pointers = second_pass_align(self.src_vecs, self.tgt_vecs, self.src_lens, self.tgt_lens,
-                                            second_w, second_path, second_alignment_types,
-                                            self.char_ratio, self.skip, margin=self.margin, len_penalty=self.len_penalty)
-        second_alignment = second_back_track(self.src_num, self.tgt_num, second_pointers, second_path, second_alignment_types)
+        # Book-scale sections switch to the linear-memory DP above dp_memory_budget bytes
+        second_beads = second_pass_beads(self.src_vecs, self.tgt_vecs,
+                                         self.src_lens, self.tgt_lens,
+                                         second_w, second_path, second_alignment_types,
+                                         self.char_ratio, self.skip, margin=self.margin, len_penalty=self.len_penalty,
+                                         dot_scale=self.src_scale * self.tgt_scale,
+                                         memory_budget=self.dp_memory_budget)
         
         print("Finished! Successfully aligning {} {} sentences to {} {} sentences\n".format(self.src_num, self.src_lang, self.tgt_num, self.tgt_lang))
-        self.result = second_alignment
+        self.beads = second_beads # (src_start, src_len, tgt_start, tgt_len) per bead
+        self.result = beads_to_alignment(second_beads)
     
     def print_sents(self):
         for bead in (self.result):
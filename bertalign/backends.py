@@ -0,0 +1,147 @@
+"""
+Registry of sentence-encoder backends used by bertalign.encoder.Encoder.
+
+A backend is created by a factory registered under a name, called as
+factory(model_name, **options), and returns an object with:
+    encode(texts, batch_size): float32 numpy array of normalized embeddings.
+    tokenizer: a Hugging Face tokenizer, or None for text-only backends.
+    max_seq_length: int (token backends only).
+    forward(input_ids, attention_mask): embeddings of a padded id batch (token backends only).
+    supports_pool: bool. True if it provides the multi-process pool methods.
+"""
+
+import numpy as np
+from pathlib import Path
+
+ENCODER_BACKENDS = {}
+
+def register_backend(name):
+    """Decorator registering an encoder backend factory under name."""
+    def decorator(factory):
+        ENCODER_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+def check_backend(name):
+    if name not in ENCODER_BACKENDS:
+        raise ValueError("Unknown encoder backend {!r}, expected one of {}".format(
+            name, tuple(ENCODER_BACKENDS)))
+    return name
+
+def load_backend(name, model_name, **options):
+    return ENCODER_BACKENDS[check_backend(name)](model_name, **options)
+
+@register_backend("sentence-transformers")
+class SentenceTransformerBackend:
+    """SentenceTransformer (torch) model, by name from the hub or cache, or by path."""
+    supports_pool = True
+
+    def __init__(self, model_name, **kwargs):
+        # Importing sentence_transformers pulls in torch, so it is done on first use.
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, **kwargs)
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self):
+        return self.model.max_seq_length
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        return self.model.encode(texts, batch_size=batch_size, **kwargs)
+
+    def forward(self, input_ids, attention_mask):
+        import torch
+        device = self.model.device
+        features = {"input_ids": torch.from_numpy(input_ids).to(device),
+                    "attention_mask": torch.from_numpy(attention_mask).to(device)}
+        with torch.no_grad():
+            vecs = self.model(features)["sentence_embedding"]
+        return vecs.float().cpu().numpy()
+
+    def start_multi_process_pool(self, target_devices):
+        return self.model.start_multi_process_pool(target_devices)
+
+    def encode_multi_process(self, texts, pool, batch_size=32):
+        return self.model.encode_multi_process(texts, pool, batch_size=batch_size)
+
+    def stop_multi_process_pool(self, pool):
+        self.model.stop_multi_process_pool(pool)
+
+@register_backend("local")
+def _local_backend(model_name, **kwargs):
+    """SentenceTransformer model saved in a local directory; never downloads."""
+    if not Path(model_name).is_dir():
+        raise FileNotFoundError("Local encoder model directory {} not found".format(model_name))
+    return SentenceTransformerBackend(model_name, local_files_only=True, **kwargs)
+
+@register_backend("onnx")
+def _onnx_backend(model_name, onnx_dir=None, **kwargs):
+    from bertalign.onnx_backend import OnnxSentenceModel
+    return OnnxSentenceModel(onnx_dir or model_name, quantized=False, **kwargs)
+
+@register_backend("onnx-int8")
+def _onnx_int8_backend(model_name, onnx_dir=None, **kwargs):
+    from bertalign.onnx_backend import OnnxSentenceModel
+    return OnnxSentenceModel(onnx_dir or model_name, quantized=True, **kwargs)
+
+@register_backend("static")
+def _static_backend(model_name, model_dir=None):
+    from bertalign.static_encoder import StaticEncoder
+    return StaticEncoder(model_dir or model_name)
+
+@register_backend("hashing")
+class HashingEncoder:
+    """
+    Deterministic character n-gram hashing encoder: every n-gram of the
+    lower-cased, space-padded text adds +-1 to a hashed bucket, and the
+    vector is L2-normalised. Pure NumPy, no model download, identical output
+    on every machine. Texts sharing n-grams get high cosine similarity, so it
+    suits synthetic corpora, tests and benchmarks, not real cross-lingual text.
+    """
+    supports_pool = False
+    tokenizer = None
+
+    def __init__(self, model_name=None, dim=256, ngram_range=(2, 4)):
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        texts = [' ' + text.lower() + ' ' for text in texts]
+        lens = np.array([len(text) for text in texts], dtype=np.int64)
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        rows = np.repeat(np.arange(len(texts)), lens)
+
+        index = []
+        signs = []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            num_grams = len(codes) - n + 1
+            if num_grams <= 0:
+                continue
+            h = np.full(num_grams, n, dtype=np.uint64)
+            for j in range(n):
+                h = h * np.uint64(1000003) + codes[j:j + num_grams]
+            h = _mix(h)
+            inside = rows[:num_grams] == rows[n - 1:]     # n-gram does not cross texts
+            h = h[inside]
+            index.append(rows[:num_grams][inside] * self.dim + (h % np.uint64(self.dim)).astype(np.int64))
+            signs.append(np.where(h >> np.uint64(63), -1.0, 1.0))
+
+        vecs = np.zeros(len(texts) * self.dim)
+        if index:
+            vecs = np.bincount(np.concatenate(index), weights=np.concatenate(signs),
+                               minlength=len(texts) * self.dim)
+        vecs = vecs.reshape(len(texts), self.dim).astype(np.float32)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vecs / norms
+
+def _mix(h):
+    # 64-bit finalizer (MurmurHash3 fmix64); uint64 arithmetic wraps around
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xff51afd7ed558ccd)
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xc4ceb9fe1a85ec53)
+    return h ^ (h >> np.uint64(33))
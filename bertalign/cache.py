@@ -0,0 +1,177 @@
+import os
+import re
+import uuid
+import hashlib
+import numpy as np
+from pathlib import Path
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of sentence embeddings for one model.
+
+    Every entry is keyed by a hash of (model name, exact overlap string).
+    Vectors are stored as float32 rows, exactly as encoded, in shard files
+    (shard-*.npy) that are memory-mapped on read; the matching shard-*.keys.npy
+    files hold the keys and make up the index, which is loaded at start-up.
+    Opening a cache only reads it, so a read-only or shared cache_dir works.
+    Every add writes a shard; when there are more than MAX_SHARDS, the
+    smallest ones are merged so that the count drops to MAX_SHARDS // 2.
+    """
+    KEY_SIZE = 16
+    MAX_SHARDS = 16
+
+    def __init__(self, cache_dir, model_name):
+        self.model_name = model_name
+        self.root = Path(cache_dir) / _slug(model_name)
+        self._index = {}        # key -> (shard name, row)
+        self._shards = {}       # shard name -> memory-mapped float32 array
+        self.dim = None
+        self._load_index()
+
+    def __len__(self):
+        return len(self._index)
+
+    def key(self, text):
+        data = (self.model_name + '\0' + text).encode('utf-8')
+        return hashlib.blake2b(data, digest_size=self.KEY_SIZE).digest()
+
+    def window_key(self, window, comb=' '):
+        """key(comb.join(window)), computed without building the joined string."""
+        digest = hashlib.blake2b((self.model_name + '\0').encode('utf-8'), digest_size=self.KEY_SIZE)
+        sep = comb.encode('utf-8')
+        for i, line in enumerate(window):
+            if i:
+                digest.update(sep)
+            digest.update(line.encode('utf-8'))
+        return digest.digest()
+
+    def lookup(self, keys):
+        """
+        Gather cached vectors for keys.
+        Args:
+            keys: list of keys from key().
+        Returns:
+            vecs: float32 numpy array of shape (len(keys), dim), or None if the cache is empty.
+            missing: list of positions in keys that are not cached.
+        """
+        missing = []
+        by_shard = {}
+        for pos, key in enumerate(keys):
+            loc = self._index.get(key)
+            if loc is None:
+                missing.append(pos)
+            else:
+                by_shard.setdefault(loc[0], ([], []))
+                by_shard[loc[0]][0].append(pos)
+                by_shard[loc[0]][1].append(loc[1])
+
+        if self.dim is None:
+            return None, missing
+
+        vecs = np.zeros((len(keys), self.dim), dtype=np.float32)
+        try:
+            for shard, (positions, rows) in by_shard.items():
+                vecs[positions] = self._shard(shard)[rows]
+        except FileNotFoundError:
+            # Merged away by another process since the index was loaded
+            self._reload()
+            return self.lookup(keys)
+        return vecs, missing
+
+    def add(self, keys, vecs):
+        """Store vecs (one row per key) as a new shard, skipping keys already cached."""
+        new = {}
+        for key, vec in zip(keys, vecs):
+            if key not in self._index:
+                new.setdefault(key, vec)
+        if not new:
+            return
+
+        data = np.asarray(list(new.values()), dtype=np.float32)
+        name = 'shard-' + uuid.uuid4().hex
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Write vectors first: a shard only becomes visible once its keys file exists.
+        _atomic_save(self.root / (name + '.npy'), data)
+        self._add_shard(name, list(new.keys()))
+        self.dim = data.shape[1]
+        self._compact()
+
+    def _add_shard(self, name, keys):
+        key_arr = np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(-1, self.KEY_SIZE)
+        _atomic_save(self.root / (name + '.keys.npy'), key_arr)
+        for row, key in enumerate(keys):
+            self._index[key] = (name, row)
+
+    def _compact(self):
+        """Merge the smallest shards into one while there are more than MAX_SHARDS."""
+        entries = {}    # shard name -> [(key, row)]
+        for key, (name, row) in self._index.items():
+            entries.setdefault(name, []).append((key, row))
+        if len(entries) <= self.MAX_SHARDS:
+            return
+        merged = sorted(entries, key=lambda name: len(entries[name]))
+        merged = merged[:len(entries) - self.MAX_SHARDS // 2 + 1]
+        keys = [key for name in merged for key, _ in entries[name]]
+
+        name = 'shard-' + uuid.uuid4().hex
+        path = self.root / (name + '.npy')
+        tmp = path.with_name(path.name + '.tmp')
+        try:
+            out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(len(keys), self.dim))
+            start = 0
+            for old in merged:
+                rows = [row for _, row in entries[old]]
+                out[start:start + len(rows)] = self._shard(old)[rows]
+                start += len(rows)
+            out.flush()
+            del out
+        except FileNotFoundError:
+            # Another process merged them first
+            tmp.unlink(missing_ok=True)
+            self._reload()
+            return
+        os.replace(tmp, path)
+        self._add_shard(name, keys)
+
+        for old in merged:
+            self._shards.pop(old, None)
+            (self.root / (old + '.keys.npy')).unlink(missing_ok=True)
+            (self.root / (old + '.npy')).unlink(missing_ok=True)
+
+    def _reload(self):
+        self._index = {}
+        self._shards = {}
+        self._load_index()
+
+    def _load_index(self):
+        for keys_file in sorted(self.root.glob('shard-*.keys.npy')):
+            name = keys_file.name[:-len('.keys.npy')]
+            try:
+                shard = self._shard(name)
+                keys = np.load(keys_file).tobytes()
+            except FileNotFoundError:
+                continue
+            if shard.dtype != np.float32:
+                # float16 shards of earlier versions would change the embeddings
+                self._shards.pop(name)
+                continue
+            for row in range(len(keys) // self.KEY_SIZE):
+                self._index[keys[row * self.KEY_SIZE:(row + 1) * self.KEY_SIZE]] = (name, row)
+            if self.dim is None:
+                self.dim = shard.shape[1]
+
+    def _shard(self, name):
+        if name not in self._shards:
+            self._shards[name] = np.load(self.root / (name + '.npy'), mmap_mode='r')
+        return self._shards[name]
+
+def _atomic_save(path, arr):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+def _slug(model_name):
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(model_name)).strip('_')[-48:]
+    digest = hashlib.blake2b(str(model_name).encode('utf-8'), digest_size=4).hexdigest()
+    return '{}-{}'.format(name, digest)
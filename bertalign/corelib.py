@@ -1,27 +1,84 @@
-import torch
-import faiss
 import numpy as np
 import numba as nb
-from sys import platform
+from bertalign.topk import band_top_k, check_engine, faiss_top_k, select_engine
+
+# Number of DP rows whose band scores are computed by one block of matrix products.
+SCORE_ROW_BLOCK = 16
+
+# Wavefront DP kernels: band tile size, and the smallest band they are used
+# for (by default) when numba has more than one thread.
+DP_TILE = 32
+WAVEFRONT_MIN_CELLS = 2**20
+
+# Largest second-pass DP table (bytes, see second_pass_table_bytes) kept in
+# memory; larger ones use the checkpointed-row second_pass_linear_beads.
+# 2**24 band cells at max_align=6: 17 float32 scores, a float32 cost and a
+# uint8 pointer per cell.
+SECOND_PASS_MAX_CELLS = 2**24
+SECOND_PASS_MEMORY_BUDGET = SECOND_PASS_MAX_CELLS * (17 * 4 + 4 + 1)
+
+# float16 bit pattern -> float32 value, a faster conversion than astype.
+HALF_TO_FLOAT = np.arange(2**16, dtype=np.uint16).view(np.float16).astype(np.float32)
 
 def second_back_track(i, j, pointers, search_path, a_types):
-    alignment = []
-    while ( 1 ):
-        j_offset = j - search_path[i][0]
-        a = pointers[i][j_offset]
+    """
+    Retrieve m-n alignments from the second-pass DP table.
+    Returns:
+        alignment: list of (src_ids, tgt_ids) tuples, see beads_to_alignment.
+    """
+    return beads_to_alignment(second_back_track_beads(i, j, pointers, search_path, a_types))
+
+@nb.jit(nopython=True, cache=True)
+def second_back_track_beads(i, j, pointers, search_path, a_types):
+    """
+    Retrieve m-n beads from the second-pass DP table.
+    Args:
+        i: int. Number of source sentences.
+        j: int. Number of target sentences.
+        pointers: numpy array. Backpointer matrix of second-pass alignment.
+        search_path: numpy array. Second-pass search path.
+        a_types: numpy array. Second-pass alignment types.
+    Returns:
+        beads: int32 numpy array of shape (num_beads, 4), one row
+               (src_start, src_len, tgt_start, tgt_len) per bead, in order.
+    """
+    beads = np.empty((i + j, 4), dtype=np.int32) # every bead covers a sentence
+    i, j, num_beads = back_track_rows(i, j, pointers, 0, search_path, a_types, beads, 0)
+    return beads[:num_beads][::-1].copy()
+
+@nb.jit(nopython=True, cache=True)
+def back_track_rows(i, j, pointers, first, search_path, a_types, beads, num_beads):
+    """
+    Follow the pointers from cell (i, j) while in DP rows >= first
+    (row i in pointers[i - first]), appending the beads, last first,
+    to beads[num_beads:].
+    Returns:
+        i, j: int. Cell where the back-tracking stopped.
+        num_beads: int. Number of beads filled.
+    """
+    while (i > 0 or j > 0) and i >= first:
+        a = pointers[i - first][j - search_path[i][0]]
+        if a >= a_types.shape[0]:
+            raise ValueError("DP cell without a predecessor, the search path is disconnected")
         s = a_types[a][0]
         t = a_types[a][1]
-        src_range = [i - offset - 1 for offset in range(s)][::-1]
-        tgt_range = [j - offset - 1 for offset in range(t)][::-1]
-        alignment.append((src_range, tgt_range))
+        i = i - s
+        j = j - t
+        beads[num_beads, 0] = i
+        beads[num_beads, 1] = s
+        beads[num_beads, 2] = j
+        beads[num_beads, 3] = t
+        num_beads += 1
+    return i, j, num_beads
 
-        i = i-s
-        j = j-t
-    
-        if i == 0 and j == 0:
-            return alignment[::-1]
+def beads_to_alignment(beads):
+    """
+    Convert an (num_beads, 4) bead array to the list of
+    ([src sentence ids], [tgt sentence ids]) tuples of Bertalign.result.
+    """
+    return [(list(range(src_start, src_start + src_len)), list(range(tgt_start, tgt_start + tgt_len)))
+            for src_start, src_len, tgt_start, tgt_len in beads.tolist()]
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
 def second_pass_align(src_vecs,
                       tgt_vecs,
                       src_lens,
@@ -32,11 +89,14 @@ def second_pass_align(src_vecs,
                       char_ratio,
                       skip,
                       margin=False,
-                      len_penalty=False):
+                      len_penalty=False,
+                      dot_scale=1.0,
+                      parallel=None):
     """
     Perform the second-pass alignment to extract m-n bitext segments.
     Args:
-        src_vecs: numpy array of shape (max_align-1, num_src_sents, embedding_size).
+        src_vecs: numpy array of shape (max_align-1, num_src_sents, embedding_size),
+                  float32, float16 or int8 (see bertalign.quantize).
         tgt_vecs: numpy array of shape (max_align-1, num_tgt_sents, embedding_size).
         src_lens: numpy array of shape (max_align-1, num_src_sents).
         tgt_lens: numpy array of shape (max_align-1, num_tgt_sents).
@@ -46,116 +106,256 @@ def second_pass_align(src_vecs,
         char_ratio: float. Source to target length ratio.
         skip: float. Cost for instertion and deletion.
         margin: boolean. True if choosing modified cosine similarity score.
+        dot_scale: float. Factor turning dot products of the stored vectors
+                   into cosine similarities (1.0 unless int8-quantized).
+        parallel: boolean. Use the wavefront-parallel DP kernel; None picks
+                  it for large bands when numba runs more than one thread.
     Returns:
         pointers: numpy array recording best alignments for each DP cell.
     """
-    # Intialize cost and backpointer matrix
+    scores = second_pass_scores(src_vecs, tgt_vecs, src_lens, tgt_lens, w,
+                                search_path, align_types, char_ratio, skip,
+                                margin=margin, len_penalty=len_penalty,
+                                dot_scale=dot_scale)
+    if use_wavefront(search_path, parallel):
+        return second_pass_dp_parallel(scores, search_path, align_types, DP_TILE)
+    return second_pass_dp(scores, search_path, align_types)
+
+def second_pass_beads(src_vecs,
+                      tgt_vecs,
+                      src_lens,
+                      tgt_lens,
+                      w,
+                      search_path,
+                      align_types,
+                      char_ratio,
+                      skip,
+                      margin=False,
+                      len_penalty=False,
+                      dot_scale=1.0,
+                      parallel=None,
+                      memory_budget=SECOND_PASS_MEMORY_BUDGET):
+    """
+    Second-pass alignment and back-tracking. Runs second_pass_align on the
+    full DP table, or second_pass_linear_beads when the table would take
+    more than memory_budget bytes (see second_pass_table_bytes).
+    Args: see second_pass_align.
+        memory_budget: int. Largest full table in bytes, None for no limit.
+    Returns:
+        beads: int32 numpy array of shape (num_beads, 4), see second_back_track_beads.
+    """
     src_len = src_vecs.shape[1]
     tgt_len = tgt_vecs.shape[1]
-    cost = np.zeros((src_len + 1, w), dtype=nb.float32)
-    pointers = np.zeros((src_len + 1, w), dtype=nb.uint8)
-  
-    for i in range(src_len + 1):
+    args = (src_vecs, tgt_vecs, src_lens, tgt_lens, w, search_path, align_types, char_ratio, skip)
+    options = dict(margin=margin, len_penalty=len_penalty, dot_scale=dot_scale)
+    if memory_budget is not None and second_pass_table_bytes(src_len, w, align_types) > memory_budget:
+        return second_pass_linear_beads(*args, **options)
+    pointers = second_pass_align(*args, parallel=parallel, **options)
+    return second_back_track_beads(src_len, tgt_len, pointers, search_path, align_types)
+
+def second_pass_table_bytes(src_len, w, align_types):
+    """Memory of the full-table second pass: float32 scores, float32 cost and uint8 pointers."""
+    return (src_len + 1) * w * (align_types.shape[0] * 4 + 4 + 1)
+
+def second_pass_linear_beads(src_vecs,
+                             tgt_vecs,
+                             src_lens,
+                             tgt_lens,
+                             w,
+                             search_path,
+                             align_types,
+                             char_ratio,
+                             skip,
+                             margin=False,
+                             len_penalty=False,
+                             dot_scale=1.0,
+                             segment_rows=None):
+    """
+    Second-pass alignment with checkpointed rows, in O(w * sqrt(num_src_sents))
+    memory. The DP rows are cut into segments of about sqrt(num_src_sents)
+    rows. A forward pass keeps, at every segment start, the cost rows a
+    bead can reach back to (max(align_types[:, 0]) rows). Going backwards,
+    each segment's scores and pointers are then recomputed from its
+    checkpoint and back-tracked. This scores the band twice but gives the
+    same beads as second_pass_align and second_back_track_beads.
+    Args: see second_pass_align.
+        segment_rows: int. Rows per segment (default: sqrt(num_src_sents),
+                      rounded up to a multiple of SCORE_ROW_BLOCK).
+    Returns:
+        beads: int32 numpy array of shape (num_beads, 4), see second_back_track_beads.
+    """
+    src_len = src_vecs.shape[1]
+    tgt_len = tgt_vecs.shape[1]
+    if segment_rows is None:
+        segment_rows = -(-int(np.sqrt(src_len)) // SCORE_ROW_BLOCK) * SCORE_ROW_BLOCK
+    reach = int(align_types[:, 0].max())
+    # Segment starts on the score block grid (blocks start at rows 1 + k * SCORE_ROW_BLOCK).
+    bounds = [0] + list(range(1 + segment_rows, src_len + 1, segment_rows)) + [src_len + 1]
+    checkpoints = np.zeros((len(bounds) - 1, reach, w), dtype=np.float32)
+    # cost[r] is DP row first - reach + r of the current segment.
+    cost = np.zeros((reach + segment_rows + 1, w), dtype=np.float32)
+    pointers = np.zeros((segment_rows + 1, w), dtype=np.uint8)
+
+    def segment_dp(k, end):
+        first = bounds[k]
+        scores = second_pass_scores(src_vecs, tgt_vecs, src_lens, tgt_lens, w, search_path,
+                                    align_types, char_ratio, skip, margin=margin,
+                                    len_penalty=len_penalty, dot_scale=dot_scale, rows=(first, end))
+        cost[:reach] = checkpoints[k]
+        cost[reach, 0] = 0 # origin (0, 0); overwritten by the DP in later segments
+        second_pass_dp_rows(cost, pointers, scores, search_path, align_types, first, end, first - reach)
+
+    for k in range(len(bounds) - 2):
+        segment_dp(k, bounds[k + 1])
+        end = bounds[k + 1] - bounds[k] + reach
+        checkpoints[k + 1] = cost[end - reach:end]
+
+    beads = np.empty((src_len + tgt_len, 4), dtype=np.int32)
+    i, j, num_beads = src_len, tgt_len, 0
+    for k in range(len(bounds) - 2, -1, -1):
+        if i < bounds[k]:
+            continue
+        segment_dp(k, i + 1)
+        i, j, num_beads = back_track_rows(i, j, pointers, bounds[k], search_path,
+                                          align_types, beads, num_beads)
+    return beads[:num_beads][::-1].copy()
+
+def second_pass_scores(src_vecs,
+                       tgt_vecs,
+                       src_lens,
+                       tgt_lens,
+                       w,
+                       search_path,
+                       align_types,
+                       char_ratio,
+                       skip,
+                       margin=False,
+                       len_penalty=False,
+                       dot_scale=1.0,
+                       row_block=SCORE_ROW_BLOCK,
+                       rows=None):
+    """
+    Score every bead the second-pass DP can use, inside the search path band.
+    For each block of rows and each (src_overlap, tgt_overlap) pair, the dot
+    products of the segments the block needs (and of their layer-0
+    neighbours) come from one matrix product; fill_band_scores combines them.
+    Args: see second_pass_align.
+        row_block: int. Number of DP rows per block of matrix products.
+        rows: (first, end) tuple. Only score DP rows first <= i < end
+              (default: all). The blocks stay those of the full table,
+              so the scores are the same.
+    Returns:
+        scores: float32 numpy array of shape (num_align_types, end-first, w).
+                scores[a, i - first, j - search_path[i][0]] is the score of
+                the bead of type a ending at cell (i, j).
+    """
+    num_overlaps, src_len, embedding_size = src_vecs.shape
+    tgt_len = tgt_vecs.shape[1]
+    first, end = rows if rows is not None else (0, src_len + 1)
+    scores = np.zeros((align_types.shape[0], end - first, w), dtype=np.float32)
+    for a, (a_1, a_2) in enumerate(align_types):
+        if a_1 == 0 or a_2 == 0:  # deletion or insertion
+            scores[a] = skip
+
+    # Overlap pairs of the beads, plus layer 0 against every layer for the margin.
+    overlap_pairs = {(a_1 - 1, a_2 - 1) for a_1, a_2 in align_types if a_1 > 0 and a_2 > 0}
+    overlap_pairs |= {(o, 0) for o in range(num_overlaps)} | {(0, o) for o in range(num_overlaps)}
+
+    block_0 = 1 + max(0, first - 1) // row_block * row_block
+    for i_0 in range(block_0, end, row_block):
+        i_1 = min(src_len + 1, i_0 + row_block)
+        # src rows: segments end at i-1, neighbours reach i and i-num_overlaps-2.
+        row_lo = max(0, i_0 - num_overlaps - 2)
+        row_hi = min(src_len, i_1)
+        # tgt rows: segments end at j-1, neighbours reach j and j-num_overlaps-2.
+        col_lo = max(0, search_path[i_0][0] - num_overlaps - 2)
+        col_hi = min(tgt_len, search_path[i_1 - 1][1] + 1)
+        src_block = _as_float32(src_vecs[:, row_lo:row_hi])
+        tgt_block = _as_float32(tgt_vecs[:, col_lo:col_hi])
+        dots = np.empty((num_overlaps, num_overlaps, row_hi - row_lo, col_hi - col_lo), dtype=np.float32)
+        for o_1, o_2 in overlap_pairs:
+            np.matmul(src_block[o_1], tgt_block[o_2].T, out=dots[o_1, o_2])
+        fill_band_scores(scores, first, dots, max(i_0, first), min(i_1, end), row_lo, col_lo,
+                         search_path, align_types, src_lens, tgt_lens, src_len, tgt_len,
+                         char_ratio, margin, len_penalty, dot_scale)
+    return scores
+
+def _as_float32(vecs):
+    # int8 products and their sums stay exact in float32 (|sum| < 2**24).
+    if vecs.dtype == np.float16:
+        return half_to_float(vecs.view(np.uint16))
+    return vecs.astype(np.float32, copy=False)
+
+@nb.jit(nopython=True, cache=True)
+def half_to_float(bits):
+    out = np.empty(bits.shape, dtype=np.float32)
+    for o in range(bits.shape[0]):
+        for r in range(bits.shape[1]):
+            for k in range(bits.shape[2]):
+                out[o, r, k] = HALF_TO_FLOAT[bits[o, r, k]]
+    return out
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def fill_band_scores(scores,
+                     score_row,
+                     dots,
+                     i_0,
+                     i_1,
+                     row_offset,
+                     col_offset,
+                     search_path,
+                     align_types,
+                     src_lens,
+                     tgt_lens,
+                     src_len,
+                     tgt_len,
+                     char_ratio,
+                     margin,
+                     len_penalty,
+                     dot_scale):
+    """
+    Fill the bead scores of DP rows i_0 <= i < i_1, row i in scores[:, i - score_row].
+    dots[o_1, o_2, s - row_offset, t - col_offset] is the dot product of
+    src_vecs[o_1, s] and tgt_vecs[o_2, t].
+    """
+    for i in range(i_0, i_1):
         i_start = search_path[i][0]
         i_end = search_path[i][1]
-        for j in range(i_start, i_end + 1):
-            if i + j == 0:
-                continue
-            best_score = -np.inf
-            best_a = -1
+        for j in range(max(i_start, 1), i_end + 1):
+            s = i - 1 - row_offset
+            t = j - 1 - col_offset
             for a in range(align_types.shape[0]):
                 a_1 = align_types[a][0]
                 a_2 = align_types[a][1]
-                prev_i = i - a_1
-                prev_j = j - a_2
-
-                if prev_i < 0 or prev_j < 0 :  # no previous cell in DP table 
+                if a_1 == 0 or a_2 == 0 or a_1 > i or a_2 > j:
                     continue
-                prev_i_start = search_path[prev_i][0]
-                prev_i_end =  search_path[prev_i][1]
-                if prev_j < prev_i_start or prev_j > prev_i_end: # out of bound of cost matrix
-                    continue
-                prev_j_offset = prev_j - prev_i_start
-                score = cost[prev_i][prev_j_offset]
-
-                if a_1 == 0 or a_2 == 0:  # deletion or insertion
-                    cur_score = skip
-                else:
-                    cur_score = calculate_similarity_score(src_vecs,
-                                                           tgt_vecs,
-                                                           i, j, a_1, a_2, 
-                                                           src_len, tgt_len,
-                                                           margin=margin)
-                    if len_penalty:
-                        penalty = calculate_length_penalty(src_lens, tgt_lens, i, j,
-                                                           a_1, a_2, char_ratio)
-                        cur_score *= penalty
-        
-                score += cur_score
-                if score > best_score:
-                    best_score = score
-                    best_a = a
-            
-            # Update cell(i, j) with the best score
-            # and rescord the trace history.
-            j_offset = j - i_start
-            cost[i][j_offset] = best_score
-            pointers[i][j_offset] = best_a
-      
-    return pointers
-
-@nb.jit(nopython=True, fastmath=True, cache=True)
-def calculate_similarity_score(src_vecs,
-                               tgt_vecs,
-                               src_idx,
-                               tgt_idx,
-                               src_overlap,
-                               tgt_overlap,
-                               src_len,
-                               tgt_len,
-                               margin=False):
-  
-    """
-    Calulate the semantics-based similarity score of bitext segment.
-    """
-    src_v = src_vecs[src_overlap - 1, src_idx - 1, :]
-    tgt_v = tgt_vecs[tgt_overlap - 1, tgt_idx - 1, :]
-    similarity = nb_dot(src_v, tgt_v)
-    if margin:
-        tgt_neighbor_ave_sim = calculate_neighbor_similarity(src_v, 
-                                                             tgt_overlap,
-                                                             tgt_idx,
-                                                             tgt_len,
-                                                             tgt_vecs)
-    
-        src_neighbor_ave_sim = calculate_neighbor_similarity(tgt_v,
-                                                             src_overlap,
-                                                             src_idx,
-                                                             src_len,
-                                                             src_vecs)
-    
-        neighbor_ave_sim = (tgt_neighbor_ave_sim + src_neighbor_ave_sim) / 2
-        similarity -= neighbor_ave_sim
+                similarity = dots[a_1 - 1, a_2 - 1, s, t]
+                if margin:
+                    # The segment against its neighbours tgt j+1 and j-a_2,
+                    # and src i+1 and i-a_1 (layer 0, 0 if missing).
+                    right_sim = dots[a_1 - 1, 0, s, t + 1] if j + 1 <= tgt_len else 0
+                    left_sim = dots[a_1 - 1, 0, s, t - a_2] if j - a_2 > 0 else 0
+                    tgt_neighbor_ave_sim = calculate_neighbor_similarity(left_sim, right_sim)
+                    right_sim = dots[0, a_2 - 1, s + 1, t] if i + 1 <= src_len else 0
+                    left_sim = dots[0, a_2 - 1, s - a_1, t] if i - a_1 > 0 else 0
+                    src_neighbor_ave_sim = calculate_neighbor_similarity(left_sim, right_sim)
+                    neighbor_ave_sim = (tgt_neighbor_ave_sim + src_neighbor_ave_sim) / 2
+                    similarity -= neighbor_ave_sim
 
-    return similarity
+                # All terms are dot products of a src and a tgt vector, so the
+                # quantization scale can be applied once.
+                cur_score = similarity * dot_scale
+                if len_penalty:
+                    penalty = calculate_length_penalty(src_lens, tgt_lens, i, j,
+                                                       a_1, a_2, char_ratio)
+                    cur_score *= penalty
+                scores[a, i - score_row, j - i_start] = cur_score
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
-def calculate_neighbor_similarity(vec, overlap, sent_idx, sent_len, db):
-    left_idx = sent_idx - overlap
-    right_idx = sent_idx + 1
-    
-    if right_idx <= sent_len:
-        right_embed = db[0, right_idx - 1, :]
-        neighbor_right_sim = nb_dot(vec, right_embed)
-    else:
-        neighbor_right_sim = 0
- 
-    if left_idx > 0:
-        left_embed = db[0, left_idx - 1, :]
-        neighbor_left_sim = nb_dot(vec, left_embed)
-    else:
-        neighbor_left_sim = 0
-    
+def calculate_neighbor_similarity(neighbor_left_sim, neighbor_right_sim):
+    """
+    Average similarity to the left and right neighbours (0 if missing).
+    """
     neighbor_ave_sim = neighbor_left_sim + neighbor_right_sim
     if neighbor_right_sim and neighbor_left_sim:
         neighbor_ave_sim /= 2
@@ -192,146 +392,277 @@ def calculate_length_penalty(src_lens,
     return length_penalty
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
-def nb_dot(x, y):
-    return np.dot(x,y)
+def second_pass_dp(scores, search_path, align_types):
+    """
+    Fill the second-pass DP table from precomputed bead scores.
+    Args:
+        scores: numpy array. Bead scores from second_pass_scores.
+        search_path: numpy array. Second-pass alignment search path.
+        align_types: numpy array. Second-pass alignment types.
+    Returns:
+        pointers: numpy array recording best alignments for each DP cell.
+    """
+    # Intialize cost and backpointer matrix
+    src_len = scores.shape[1] - 1
+    w = scores.shape[2]
+    cost = np.zeros((src_len + 1, w), dtype=nb.float32)
+    pointers = np.zeros((src_len + 1, w), dtype=nb.uint8)
+    second_pass_dp_rows(cost, pointers, scores, search_path, align_types, 0, src_len + 1, 0)
+    return pointers
+
+@nb.jit(nopython=True, fastmath=True, cache=True)
+def second_pass_dp_rows(cost, pointers, scores, search_path, align_types, first, end, cost_row):
+    """
+    Fill DP rows first <= i < end. Row i of scores and pointers is
+    scores[:, i - first] and pointers[i - first], its cost is cost[i - cost_row];
+    the cost rows of the predecessors (up to max(align_types[:, 0]) rows
+    back) must already hold their values.
+    """
+    for i in range(first, end):
+        for j in range(search_path[i][0], search_path[i][1] + 1):
+            if i + j > 0:
+                second_pass_cell(cost, pointers, scores, search_path, align_types, i, j, cost_row, first)
+
+@nb.jit(nopython=True, fastmath=True, parallel=True, cache=True)
+def second_pass_dp_parallel(scores, search_path, align_types, tile):
+    """
+    second_pass_dp over anti-diagonal waves of band tiles, the tiles of a
+    wave in parallel (see wavefront_tiles). Same pointers as second_pass_dp.
+    """
+    src_len = scores.shape[1] - 1
+    w = scores.shape[2]
+    cost = np.zeros((src_len + 1, w), dtype=nb.float32)
+    pointers = np.zeros((src_len + 1, w), dtype=nb.uint8)
+
+    wave_start, wave_end = wavefront_tiles(search_path, tile)
+    for wave in range(wave_start.shape[0]):
+        for row_tile in nb.prange(wave_start[wave], wave_end[wave] + 1):
+            col_tile = wave - row_tile
+            for i in range(row_tile * tile, min((row_tile + 1) * tile, src_len + 1)):
+                j_start = max(col_tile * tile, search_path[i][0])
+                j_end = min((col_tile + 1) * tile - 1, search_path[i][1])
+                for j in range(j_start, j_end + 1):
+                    if i + j > 0:
+                        second_pass_cell(cost, pointers, scores, search_path, align_types, i, j, 0, 0)
+
+    return pointers
+
+@nb.jit(nopython=True, fastmath=True, cache=True, inline='always')
+def second_pass_cell(cost, pointers, scores, search_path, align_types, i, j, cost_row, score_row):
+    """
+    Fill DP cell (i, j) != (0, 0) of the second pass from its predecessors.
+    Row i is cost[i - cost_row], scores[:, i - score_row] and pointers[i - score_row].
+    """
+    i_start = search_path[i][0]
+    j_offset = j - i_start
+    best_score = -np.inf
+    best_a = -1
+    for a in range(align_types.shape[0]):
+        a_1 = align_types[a][0]
+        a_2 = align_types[a][1]
+        prev_i = i - a_1
+        prev_j = j - a_2
+
+        if prev_i < 0 or prev_j < 0 :  # no previous cell in DP table 
+            continue
+        prev_i_start = search_path[prev_i][0]
+        prev_i_end =  search_path[prev_i][1]
+        if prev_j < prev_i_start or prev_j > prev_i_end: # out of bound of cost matrix
+            continue
+        prev_j_offset = prev_j - prev_i_start
+        score = cost[prev_i - cost_row][prev_j_offset] + scores[a, i - score_row, j_offset]
+        if score > best_score:
+            best_score = score
+            best_a = a
+    
+    # Update cell(i, j) with the best score
+    # and rescord the trace history.
+    cost[i - cost_row][j_offset] = best_score
+    pointers[i - score_row][j_offset] = best_a
+
+def use_wavefront(search_path, parallel=None, tile=DP_TILE):
+    """
+    Decide whether a DP over search_path runs on the wavefront-parallel kernel.
+    Wide bands only: a wave has about band width / tile independent tiles.
+    """
+    if parallel is not None:
+        return parallel
+    if nb.get_num_threads() < 2:
+        return False
+    widths = search_path[:, 1] - search_path[:, 0] + 1
+    return widths.sum() >= WAVEFRONT_MIN_CELLS and widths.max() >= 4 * tile
+
+@nb.jit(nopython=True, cache=True)
+def wavefront_tiles(search_path, tile):
+    """
+    Split the DP band into tile x tile blocks, row tile r and column tile c
+    covering rows [r*tile, (r+1)*tile) and target indices [c*tile, (c+1)*tile).
+    Every alignment type moves at least one row or column forward, so a
+    cell only depends on cells of tiles (r' <= r, c' <= c): the tiles of
+    anti-diagonal wave r + c are independent once earlier waves are done.
+    The search path must be monotone, as the second-pass path is.
+    Returns:
+        wave_start, wave_end: numpy arrays. Row tiles of wave k are
+                              wave_start[k] to wave_end[k] (inclusive).
+    """
+    num_rows = search_path.shape[0]
+    num_row_tiles = (num_rows + tile - 1) // tile
+    # Wave of the first and last column tile touched by each row tile.
+    first_wave = np.empty(num_row_tiles, dtype=np.int64)
+    last_wave = np.empty(num_row_tiles, dtype=np.int64)
+    for r in range(num_row_tiles):
+        rows = search_path[r * tile:min((r + 1) * tile, num_rows)]
+        first_wave[r] = rows[:, 0].min() // tile + r
+        last_wave[r] = rows[:, 1].max() // tile + r
+    num_waves = last_wave[-1] + 1
+    waves = np.arange(num_waves)
+    wave_start = np.searchsorted(last_wave, waves, side='left')
+    wave_end = np.searchsorted(first_wave, waves, side='right') - 1
+    return wave_start, wave_end
 
 def find_second_search_path(align, w, src_len, tgt_len):
     """
     Convert 1-1 first-pass alignment to the second-round path.
     The indices along X-axis and Y-axis must be consecutive.
     Args:
-        align: list of tuples. First-pass alignment results.
+        align: list of tuples or numpy array of shape (num_anchors, 2).
+               First-pass alignment results.
         w: int. Predefined window size for the second path.
         src_len: int. Number of source sentences.
         tgt_len: int. Number of target sentences.
     Returns:
+        max_w: int. Width of the widest row of the path, plus one.
         path: numpy array. Search path for the second-pass alignment.
     """
+    anchors = np.asarray(align, dtype=np.int64).reshape(-1, 2)
+    return second_search_path(anchors, w, src_len, tgt_len)
+
+@nb.jit(nopython=True, cache=True)
+def second_search_path(anchors, w, src_len, tgt_len):
     # Ajust the first-alignment result
     # so that the last bead is (src_len, tgt_len).
-    last_bead_src = align[-1][0]
-    last_bead_tgt = align[-1][1]
-    if last_bead_src != src_len:
-        if last_bead_tgt == tgt_len:
-            align.pop()
-        align.append((src_len, tgt_len))
-    else:
-        if last_bead_tgt != tgt_len:
-            align.pop()
-            align.append((src_len, tgt_len))
-    
+    num_anchors = anchors.shape[0]
+    end_anchor = True
+    if num_anchors > 0:
+        last_bead_src = anchors[num_anchors - 1][0]
+        last_bead_tgt = anchors[num_anchors - 1][1]
+        if last_bead_src == src_len and last_bead_tgt == tgt_len:
+            end_anchor = False
+        elif last_bead_src == src_len or last_bead_tgt == tgt_len:
+            num_anchors -= 1 # replaced by (src_len, tgt_len)
+
     """
     Find the search path for each row.
     """
+    path = np.empty((src_len + 1, 2), dtype=np.int64)
     prev_src, prev_tgt = 0, 0
-    path = []
-    max_w = -np.inf
-    for src, tgt in align:
+    max_w = -1
+    for k in range(num_anchors + end_anchor):
+        if k < num_anchors:
+            src = anchors[k][0]
+            tgt = anchors[k][1]
+        else:
+            src = src_len
+            tgt = tgt_len
         # Limit the search path in a rectangle with the width
         # along the Y axis being (upper_bound - lower_bound).
         lower_bound = max(0, prev_tgt - w)
         upper_bound = min(tgt_len, tgt + w)
-        path.extend([(lower_bound, upper_bound) for id in range(prev_src+1, src+1)])
+        for row in range(prev_src + 1, src + 1):
+            path[row][0] = lower_bound
+            path[row][1] = upper_bound
         prev_src, prev_tgt = src, tgt
         width = upper_bound - lower_bound
         if width > max_w:
             max_w = width
-    path = [path[0]] + path # add the search path for row 0
-    return max_w + 1, np.array(path)
-
-def first_back_track(i, j, pointers, search_path, a_types):
-    """
-    Retrieve 1-1 alignments from the first-pass DP table.
-    Args:
-        i: int. Number of source sentences.
-        j: int. Number of target sentences.
-        pointers: numpy array. Backpointer matrix of first-pass alignment.
-        search_path: numpy array. First-pass search path.
-        a_types: numpy array. First-pass alignment types.
-    Returns:
-        alignment: list of tuples for 1-1 alignments.
-    """
-    alignment = []
-    while ( 1 ):
-        j_offset = j - search_path[i][0]
-        a = pointers[i][j_offset]
-        s = a_types[a][0]
-        t = a_types[a][1]
-        if a == 2: # best 1-1 alignment
-            alignment.append((i, j))
-
-        i = i-s
-        j = j-t
-    
-        if i == 0 and j == 0: # if reaching the origin
-            return alignment[::-1]
+    path[0] = path[1] # add the search path for row 0
+    return max_w + 1, path
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
-def first_pass_align(src_len,
-                     tgt_len,
-                     w,
-                     search_path,
-                     align_types,
-                     dist,
-                     index
-                     ):
+def first_pass_sparse_align(src_len,
+                            tgt_len,
+                            search_path,
+                            dist,
+                            index):
     """
-    Perform the first-pass alignment to extract only 1-1 bitext segments.
+    Perform the first-pass alignment on the top-k candidates only.
+    Skips and 1-1 beads outside the top-k score 0 in the original dense
+    first-pass DP, so its best path is the heaviest chain of top-k cells
+    (i, j) strictly increasing in i and j, and its 1-1 anchors are that
+    chain. Finding the chain directly costs O(num_src_sents * k *
+    log(num_tgt_sents)) instead of a DP over the whole search path band
+    (benchmarks/reference_first_pass.py keeps the DP to check this). Cell (i, j) stands for source
+    sentence i-1 and target sentence j-1; it is used only if it and
+    (i-1, j-1) are inside the search path, as a 1-1 bead would be.
     Args:
         src_len: int. Number of source sentences.
         tgt_len: int. Number of target sentences.
-        w: int. Window size for the first-pass alignment.
         search_path: numpy array. Search path for the first-pass alignment.
-        align_types: numpy array. Alignment types for the first-pass alignment.
         dist: numpy array. Distance matrix for top-k similar vecs.
         index: numpy array. Index matrix for top-k similar vecs.
     Returns:
-        pointers: numpy array recording best alignments for each DP cell.
+        alignment: numpy array of shape (num_anchors, 2), the (i, j) cells
+                   of the 1-1 anchors in order.
     """
-    # Initialize cost and backpointer matrix.
-    cost = np.zeros((src_len + 1, 2 * w + 1), dtype=nb.float32)
-    pointers = np.zeros((src_len + 1, 2 * w + 1), dtype=nb.uint8)
-  
     top_k = index.shape[1]
+    chain_score = np.zeros(src_len * top_k, dtype=nb.float32)
+    chain_prev = np.full(src_len * top_k, -1, dtype=np.int64)
+    # Fenwick tree over target positions 1..tgt_len holding prefix maxima
+    # of the chain scores and the candidate (i-1)*top_k + k reaching them.
+    tree_score = np.zeros(tgt_len + 1, dtype=nb.float32)
+    tree_cand = np.full(tgt_len + 1, -1, dtype=np.int64)
+    best_score = nb.float32(0)
+    best_cand = -1
 
-    for i in range(src_len + 1):
-        i_start = search_path[i][0]
-        i_end = search_path[i][1]
-        for j in range(i_start, i_end + 1):
-            if i + j == 0: # initialize the origin with zero
+    for i in range(1, src_len + 1):
+        # Chain scores of the row's candidates, from earlier rows only.
+        for k in range(top_k):
+            c = (i - 1) * top_k + k
+            j = index[i - 1][k] + 1
+            chain_prev[c] = -2 # not usable
+            if dist[i - 1][k] <= 0 or j < 1:
                 continue
-            best_score = -np.inf
-            best_a = -1
-            for a in range(align_types.shape[0]):
-                a_1 = align_types[a][0]
-                a_2 = align_types[a][1]
-                prev_i = i - a_1
-                prev_j = j - a_2
-                if prev_i < 0 or prev_j < 0 :  # no previous cell 
-                    continue
-                prev_i_start = search_path[prev_i][0]
-                prev_i_end =  search_path[prev_i][1]
-                if prev_j < prev_i_start or prev_j > prev_i_end: # out of bound of cost matrix
-                    continue
-                prev_j_offset = prev_j - prev_i_start
-                score = cost[prev_i][prev_j_offset]
-                
-                # Extract the score for 1-1 bead from faiss.
-                if a_1 > 0 and a_2 > 0:
-                    for k in range(top_k):
-                        if index[i-1][k] == j - 1:
-                            score += dist[i-1][k]
-                if score > best_score:
-                    best_score = score
-                    best_a = a
-            
-            # Update cell(i, j) with the best score
-            # and rescord the trace history.
-            j_offset = j - i_start
-            cost[i][j_offset] = best_score
-            pointers[i][j_offset] = best_a
+            if j < search_path[i][0] or j > search_path[i][1]:
+                continue
+            if j - 1 < search_path[i - 1][0] or j - 1 > search_path[i - 1][1]:
+                continue
+            score = nb.float32(0)
+            prev = -1
+            pos = j - 1
+            while pos > 0:
+                if tree_score[pos] > score:
+                    score = tree_score[pos]
+                    prev = tree_cand[pos]
+                pos -= pos & -pos
+            chain_score[c] = score + dist[i - 1][k]
+            chain_prev[c] = prev
+            if chain_score[c] > best_score:
+                best_score = chain_score[c]
+                best_cand = c
 
-    return pointers
+        for k in range(top_k):
+            c = (i - 1) * top_k + k
+            if chain_prev[c] == -2:
+                continue
+            pos = index[i - 1][k] + 1
+            while pos <= tgt_len:
+                if chain_score[c] > tree_score[pos]:
+                    tree_score[pos] = chain_score[c]
+                    tree_cand[pos] = c
+                pos += pos & -pos
+
+    num_anchors = 0
+    c = best_cand
+    while c >= 0:
+        num_anchors += 1
+        c = chain_prev[c]
+    chain = np.empty((num_anchors, 2), dtype=np.int64)
+    c = best_cand
+    for n in range(num_anchors - 1, -1, -1):
+        chain[n, 0] = c // top_k + 1
+        chain[n, 1] = index[c // top_k][c % top_k] + 1
+        c = chain_prev[c]
+    return chain
 
 def find_first_search_path(src_len,
                            tgt_len,
@@ -377,26 +708,29 @@ def get_alignment_types(max_alignment_size):
                 alignment_types.append([x, y])    
     return np.array(alignment_types)
 
-def find_top_k_sents(src_vecs, tgt_vecs, k=3):
+def find_top_k_sents(src_vecs, tgt_vecs, k=3, engine="flat", search_path=None):
     """
     Find the top_k similar vecs in tgt_vecs for each vec in src_vecs.
     Args:
         src_vecs: numpy array of shape (num_src_sents, embedding_size).
         tgt_vecs: numpy array of shape (num_tgt_sents, embedding_size).
         k: int. Number of most similar target sentences.
+        engine: str. Search engine, see bertalign.topk.TOP_K_ENGINES.
+        search_path: numpy array. First-pass search path; "band" and "auto"
+                     search each source sentence's window only (default:
+                     find_first_search_path).
     Returns:
         D: numpy array. Similarity score matrix of shape (num_src_sents, k).
         I: numpy array. Target index matrix of shape (num_src_sents, k).
     """
-    embedding_size = src_vecs.shape[1]
-    if torch.cuda.is_available() and platform == 'linux': # GPU version
-        res = faiss.StandardGpuResources() 
-        index = faiss.IndexFlatIP(embedding_size)
-        gpu_index = faiss.index_cpu_to_gpu(res, 0, index)
-        gpu_index.add(tgt_vecs) 
-        D, I = gpu_index.search(src_vecs, k)
-    else: # CPU version
-        index = faiss.IndexFlatIP(embedding_size)
-        index.add(tgt_vecs)
-        D, I = index.search(src_vecs, k)
-    return D, I
+    if check_engine(engine) in ("auto", "band"):
+        src_len, tgt_len = len(src_vecs), len(tgt_vecs)
+        if search_path is None:
+            search_path = find_first_search_path(src_len, tgt_len)[1]
+        # Source sentence s is row s + 1 of the path, target sentence t column t + 1.
+        starts = np.maximum(search_path[1:, 0] - 1, 0)
+        ends = np.minimum(search_path[1:, 1] - 1, tgt_len - 1)
+        engine = select_engine(engine, starts, ends)
+        if engine == "band":
+            return band_top_k(src_vecs, tgt_vecs, starts, ends, k)
+    return faiss_top_k(src_vecs, tgt_vecs, k, engine)
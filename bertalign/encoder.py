@@ -1,24 +1,427 @@
+import os
+import atexit
+import tempfile
+import threading
 import numpy as np
 
-from sentence_transformers import SentenceTransformer
-from bertalign.utils import yield_overlaps
+from bertalign.backends import check_backend, load_backend
+from bertalign.cache import EmbeddingCache
+from bertalign.utils import (MAX_OVERLAP_CHARS, PAD_WINDOW, overlap_lengths, overlap_text,
+                             preprocess_lines, yield_overlap_windows)
 
 class Encoder:
-    def __init__(self, model_name):
-        self.model = SentenceTransformer(model_name)
+    """
+    Sentence encoder whose model is loaded lazily (thread-safe) on first use,
+    so importing bertalign stays cheap.
+    The model comes from a registered backend (see bertalign.backends):
+    SentenceTransformer by name or local path, an ONNX export run by onnxruntime,
+    or the deterministic hashing encoder for tests and benchmarks.
+    """
+    def __init__(self, model_name, cache_dir=None, batch_size=32, token_budget=None, num_workers=0,
+                 backend="sentence-transformers", onnx_dir=None, compose_overlaps=False,
+                 chunk_size=8192, memmap_dir=None, backend_options=None):
         self.model_name = model_name
+        self.backend = check_backend(backend)
+        self.onnx_dir = onnx_dir
+        self.backend_options = backend_options or {}
+        self._model = None
+        self._dim = None
+        self._pool = None
+        self._stop_at_exit = False
+        self._lock = threading.Lock()
+        self.cache = None
+        if cache_dir:
+            self.use_cache(cache_dir)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.num_workers = num_workers
+        self.compose_overlaps = compose_overlaps
+        self.chunk_size = chunk_size
+        self.memmap_dir = memmap_dir
+        self._sent_ids = {}
+        self.reset_stats()
 
-    def transform(self, sents, num_overlaps):
-        overlaps = []
-        for line in yield_overlaps(sents, num_overlaps):
-            overlaps.append(line)
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
 
-        sent_vecs = self.model.encode(overlaps)
-        embedding_dim = sent_vecs.size // (len(sents) * num_overlaps)
-        sent_vecs.resize(num_overlaps, len(sents), embedding_dim)
+    def _load_model(self):
+        options = dict(self.backend_options)
+        if self.backend.startswith("onnx"):
+            options.setdefault("onnx_dir", self.onnx_dir)
+        return load_backend(self.backend, self.model_name, **options)
 
-        len_vecs = [len(line.encode("utf-8")) for line in overlaps]
-        len_vecs = np.array(len_vecs)
-        len_vecs.resize(num_overlaps, len(sents))
+    def preload(self):
+        """Load the model now instead of on the first transform (for long-running workers)."""
+        self.model
+        return self
 
+    def configure(self, model_name=None, cache_dir=None, batch_size=32, token_budget=None, num_workers=0,
+                  backend="sentence-transformers", onnx_dir=None, compose_overlaps=False,
+                  chunk_size=8192, memmap_dir=None, backend_options=None):
+        """
+        Select the model (name or local path), backend, embedding cache directory and batching.
+        This is a full reconfiguration: every option not passed is reset to its default,
+        as in Encoder(), except model_name, which is kept when None. Pass all the options
+        you need (e.g. **GeneratorConfig().encoder_options) rather than a partial set.
+        Changing the model or backend drops the loaded one; it is reloaded on next use.
+        Args:
+            batch_size: int. Maximum number of sentences per forward pass.
+            token_budget: int. If set, sentences are sorted by token length and packed
+                          into batches of at most token_budget padded tokens.
+            num_workers: int. Number of CPU encoding processes (each with its own
+                         model copy); 0 or 1 encodes in this process. Only used by
+                         backends that support it (sentence-transformers, local).
+            backend: str. A registered backend name (bertalign.backends.ENCODER_BACKENDS).
+            onnx_dir: str. Directory of the ONNX export (defaults to model_name).
+            backend_options: dict. Extra keyword arguments for the backend factory,
+                             e.g. {"dim": 256} for the hashing encoder.
+            compose_overlaps: bool. Encode single sentences only and approximate
+                              multi-sentence windows from them (see transform).
+            chunk_size: int. Number of overlaps generated and encoded at a time.
+            memmap_dir: str. If set, embeddings are written to memory-mapped
+                        temporary files in this directory instead of RAM.
+        """
+        backend = check_backend(backend)
+        backend_options = backend_options or {}
+        changed = ((model_name and model_name != self.model_name) or backend != self.backend
+                   or onnx_dir != self.onnx_dir or backend_options != self.backend_options)
+        if changed or num_workers != self.num_workers:
+            self.stop_pool()
+        with self._lock:
+            if changed:
+                self.model_name = model_name or self.model_name
+                self.backend = backend
+                self.onnx_dir = onnx_dir
+                self.backend_options = backend_options
+                self._model = None
+                self._dim = None
+        self.use_cache(cache_dir)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.num_workers = num_workers
+        self.compose_overlaps = compose_overlaps
+        self.chunk_size = chunk_size
+        self.memmap_dir = memmap_dir
+
+    def start_pool(self):
+        """
+        Start the multi-process encoding pool (no-op unless num_workers > 1).
+        The pool is kept alive until stop_pool(), so that it is shared by all
+        sections of a run instead of paying N model loads per section.
+        """
+        if self.num_workers > 1 and self._pool is None and getattr(self.model, "supports_pool", False):
+            # Split the cores between workers instead of letting every
+            # worker's torch spawn one thread per core.
+            threads = str(max(1, (os.cpu_count() or 1) // self.num_workers))
+            saved = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = threads
+            try:
+                self._pool = self.model.start_multi_process_pool(["cpu"] * self.num_workers)
+            finally:
+                if saved is None:
+                    del os.environ["OMP_NUM_THREADS"]
+                else:
+                    os.environ["OMP_NUM_THREADS"] = saved
+            if not self._stop_at_exit:
+                atexit.register(self.stop_pool)
+                self._stop_at_exit = True
+        return self
+
+    def stop_pool(self):
+        """Stop the encoding processes, if running."""
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def use_cache(self, cache_dir):
+        """
+        Enable the persistent embedding cache in cache_dir (None disables it).
+        Other backends than SentenceTransformer get their own namespace, since
+        their vectors differ.
+        """
+        name = self.model_name
+        if self.backend not in ("sentence-transformers", "local"):
+            name = "{}@{}".format(name, self.backend)
+        if self.backend_options:
+            name = "{}{}".format(name, sorted(self.backend_options.items()))
+        self.cache = EmbeddingCache(cache_dir, name) if cache_dir else None
+
+    def reset_stats(self):
+        """Reset the counters of overlaps seen / unique / encoded by the model."""
+        self.stats = {"overlaps": 0, "unique": 0, "encoded": 0}
+
+    def transform(self, sents, num_overlaps, dtype=np.float32):
+        """
+        Embed every overlap (window of 1..num_overlaps sentences) of sents.
+        Overlaps are generated lazily as tuples of sentences and encoded
+        chunk_size at a time straight into the preallocated result (a memmap
+        when memmap_dir is set), so memory is bounded by one chunk plus the
+        result array (and a window -> row map: each distinct window is encoded
+        once per call, repeats in later chunks copy its row). Each sentence is
+        tokenized once; window inputs are built from the cached token ids and
+        byte lengths from prefix sums.
+        Args:
+            sents: list of str.
+            num_overlaps: int. Number of overlap layers.
+            dtype: numpy dtype of the returned embeddings (e.g. np.float16).
+        Returns:
+            sent_vecs: numpy array of shape (num_overlaps, len(sents), embedding_size).
+            len_vecs: numpy array of shape (num_overlaps, len(sents)). Overlap lengths in bytes.
+        """
+        lines = preprocess_lines(sents)
+        num_sents = len(lines)
+        len_vecs = overlap_lengths(lines, num_overlaps)
+        self._sent_ids = {}     # sentence -> token ids, for this call only
+
+        if self.compose_overlaps:
+            sent_vecs = self._compose(lines, len_vecs[0], num_overlaps, dtype)
+            self._sent_ids = {}
+            return sent_vecs, len_vecs
+
+        sent_vecs = None
+        rows = {}       # window -> row of its first occurrence, across chunks
+        pos = 0
+        for chunk in _chunks(yield_overlap_windows(lines, num_overlaps), self.chunk_size):
+            fresh = []
+            copy_to = []
+            copy_from = []
+            for k, window in enumerate(chunk):
+                row = rows.setdefault(window, pos + k)
+                if row == pos + k:
+                    fresh.append(k)
+                else:
+                    copy_to.append(pos + k)
+                    copy_from.append(row)
+            self.stats["overlaps"] += len(chunk)
+            self.stats["unique"] += len(fresh)
+            if fresh:
+                # The first chunk always has a fresh window, so sent_vecs exists before any copy
+                vecs = self._encode_unique([chunk[k] for k in fresh])
+                if sent_vecs is None:
+                    sent_vecs = self._allocate((num_overlaps, num_sents, vecs.shape[1]), dtype)
+                flat = sent_vecs.reshape(-1, vecs.shape[1])
+                flat[pos + np.array(fresh, dtype=np.int64)] = vecs
+            # Repeated windows (PAD, refrains, boilerplate lines) are copied, also across chunks
+            flat[copy_to] = flat[copy_from]
+            pos += len(chunk)
+        self._sent_ids = {}
         return sent_vecs, len_vecs
+
+    def _allocate(self, shape, dtype):
+        if not self.memmap_dir:
+            return np.empty(shape, dtype=dtype)
+        # The file is unlinked on close; the mapping keeps it alive until the array is freed.
+        with tempfile.TemporaryFile(dir=self.memmap_dir, prefix="embeddings-") as f:
+            return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+    def _compose(self, lines, lens, num_overlaps, dtype):
+        """
+        Approximate mode: run the model on the single sentences (first overlap
+        layer) only, and build the vector of every window of k sentences as the
+        byte-length-weighted mean of its members' vectors, re-normalised.
+        This needs one forward pass per sentence instead of num_overlaps.
+        """
+        num_sents = len(lines)
+        vecs = self._encode([(line,) for line in lines] + [PAD_WINDOW])
+        pad_vec = vecs[-1]
+        vecs = vecs[:-1]
+        self.stats["overlaps"] += num_overlaps * num_sents - (num_sents + 1)
+
+        weights = lens.astype(np.float64)
+        weighted = np.zeros((num_sents + 1, vecs.shape[1]), dtype=np.float64)
+        np.cumsum(vecs * weights[:, None], axis=0, out=weighted[1:])
+
+        sent_vecs = self._allocate((num_overlaps, num_sents, vecs.shape[1]), dtype)
+        sent_vecs[0] = vecs
+        for overlap in range(2, num_overlaps + 1):
+            num_pads = min(overlap - 1, num_sents)
+            sent_vecs[overlap - 1, :num_pads] = pad_vec
+            # window ending at sentence i covers sentences i-overlap+1 .. i
+            window = weighted[overlap:] - weighted[:num_sents + 1 - overlap]
+            norms = np.linalg.norm(window, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            sent_vecs[overlap - 1, num_pads:] = window / norms
+        return sent_vecs
+
+    def _encode(self, windows):
+        """
+        Encode each distinct overlap window once and scatter the vectors back.
+        PAD placeholders, BLANK_LINE and repeated windows (refrains, formulaic
+        lines) would otherwise each cost a transformer forward pass.
+        """
+        unique_ids = {}
+        inverse = np.fromiter((unique_ids.setdefault(window, len(unique_ids)) for window in windows),
+                              dtype=np.int64, count=len(windows))
+        unique_vecs = self._encode_unique(list(unique_ids))
+
+        self.stats["overlaps"] += len(windows)
+        self.stats["unique"] += len(unique_ids)
+        return unique_vecs[inverse]
+
+    def _encode_unique(self, windows):
+        """
+        Encode distinct windows, reusing cached vectors and encoding only the cache misses.
+        """
+        if not windows:
+            return self._empty()
+        if self.cache is None:
+            self.stats["encoded"] += len(windows)
+            return self._model_encode(windows)
+
+        keys = [self._cache_key(window) for window in windows]
+        sent_vecs, missing = self.cache.lookup(keys)
+        if missing:
+            self.stats["encoded"] += len(missing)
+            new_vecs = self._model_encode([windows[i] for i in missing])
+            self.cache.add([keys[i] for i in missing], new_vecs)
+            if sent_vecs is None:
+                sent_vecs = np.zeros((len(windows), new_vecs.shape[1]), dtype=np.float32)
+            sent_vecs[missing] = new_vecs
+        return sent_vecs
+
+    def _cache_key(self, window):
+        # Same key as the joined overlap string, which older cache entries used
+        if sum(len(line) for line in window) + len(window) - 1 > MAX_OVERLAP_CHARS:
+            return self.cache.key(overlap_text(window))
+        return self.cache.window_key(window)
+
+    def _model_encode(self, windows):
+        """
+        Run the model on windows. Inputs are sorted by token length and packed
+        into batches of at most batch_size whose padded size (batch count x
+        longest member) stays under the token budget, if any; the vectors are
+        then restored to input order.
+        With num_workers > 1, chunks of windows are fanned out to the process pool.
+        """
+        if not windows:
+            return self._empty()
+        vecs = self._run_model(windows)
+        self._dim = vecs.shape[1]
+        return vecs
+
+    def _run_model(self, windows):
+        if self.num_workers > 1 and len(windows) > 1 and getattr(self.model, "supports_pool", False):
+            return self._pool_encode(windows)
+        if self.model.tokenizer is None:
+            return self._text_encode([overlap_text(window) for window in windows])
+
+        ids = self._window_ids(windows)
+        lengths = np.array([len(x) for x in ids], dtype=np.int64)
+        order = np.argsort(lengths, kind="stable")
+        token_budget = self.token_budget or np.inf
+        sent_vecs = None
+        for batch in _token_budget_batches(order, lengths, token_budget, self.batch_size):
+            vecs = self._forward([ids[i] for i in batch])
+            if sent_vecs is None:
+                sent_vecs = np.empty((len(windows), vecs.shape[1]), dtype=np.float32)
+            sent_vecs[batch] = vecs
+        return sent_vecs
+
+    def _empty(self):
+        """
+        A (0, dim) array for an empty input. The backends do not share a way to
+        report their dimension, so it is taken from the last encode, or from
+        encoding one PAD window if nothing was encoded yet.
+        """
+        if self._dim is None:
+            self._model_encode([PAD_WINDOW])
+        return np.empty((0, self._dim), dtype=np.float32)
+
+    def _window_ids(self, windows):
+        """
+        Model input ids of windows, built by concatenating the token ids of their
+        sentences (each tokenized once per transform) up to the model max length.
+        This matches tokenizing the joined string for WordPiece tokenizers such as
+        LaBSE's, which split on whitespace before sub-word segmentation.
+        """
+        tokenizer = self.model.tokenizer
+        new_lines = list({line: None for window in windows for line in window
+                          if line not in self._sent_ids})
+        if new_lines:
+            new_ids = tokenizer(new_lines, add_special_tokens=False)["input_ids"]
+            self._sent_ids.update(zip(new_lines, new_ids))
+
+        max_tokens = self.model.max_seq_length - tokenizer.num_special_tokens_to_add()
+        ids = []
+        for window in windows:
+            if sum(len(line) for line in window) + len(window) - 1 > MAX_OVERLAP_CHARS:
+                # Windows cut at MAX_OVERLAP_CHARS are tokenized as the cut string
+                window_ids = tokenizer(overlap_text(window), add_special_tokens=False)["input_ids"]
+            else:
+                window_ids = []
+                for line in window:
+                    window_ids.extend(self._sent_ids[line])
+                    if len(window_ids) >= max_tokens:
+                        break
+            ids.append(tokenizer.build_inputs_with_special_tokens(window_ids[:max_tokens]))
+        return ids
+
+    def _forward(self, batch_ids):
+        """Embed one batch of input id lists."""
+        input_ids, attention_mask = _pad_ids(batch_ids, self.model.tokenizer.pad_token_id)
+        return self.model.forward(input_ids, attention_mask)
+
+    def _text_encode(self, lines):
+        """Encode lines with a backend that has no tokenizer (e.g. hashing)."""
+        return np.asarray(self.model.encode(lines, batch_size=self.batch_size), dtype=np.float32)
+
+    def _pool_encode(self, windows):
+        """
+        Encode windows on the process pool. They are sorted by token length
+        first so that every chunk (and every batch inside it) holds similar
+        lengths; the pool returns chunks in order and the vectors are unsorted
+        afterwards. The workers tokenize the window text, so the lengths come
+        from the per-sentence token ids (_window_ids) instead of tokenizing
+        every window here as well.
+        """
+        self.start_pool()
+        lines = [overlap_text(window) for window in windows]
+        if not self.token_budget:
+            return self.model.encode_multi_process(lines, self._pool, batch_size=self.batch_size)
+
+        lengths = np.array([len(ids) for ids in self._window_ids(windows)], dtype=np.int64)
+        order = np.argsort(lengths, kind="stable")
+        vecs = self.model.encode_multi_process([lines[i] for i in order], self._pool,
+                                               batch_size=self.batch_size)
+        sent_vecs = np.empty_like(vecs)
+        sent_vecs[order] = vecs
+        return sent_vecs
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _pad_ids(batch_ids, pad_id):
+    input_ids = np.full((len(batch_ids), max(len(x) for x in batch_ids)), pad_id, dtype=np.int64)
+    attention_mask = np.zeros(input_ids.shape, dtype=np.int64)
+    for row, ids in enumerate(batch_ids):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+def _token_budget_batches(order, lengths, token_budget, batch_size):
+    """
+    Split indices (sorted by ascending length) into batches where
+    len(batch) * longest member <= token_budget and len(batch) <= batch_size.
+    A single sentence longer than the budget gets a batch of its own.
+    """
+    batch = []
+    for i in order:
+        # lengths are ascending, so the current sentence is the longest in the batch
+        if batch and ((len(batch) + 1) * lengths[i] > token_budget or len(batch) >= batch_size):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
@@ -0,0 +1,133 @@
+"""
+ONNX Runtime backend for the sentence encoder.
+
+Export a SentenceTransformer model once (needs torch and sentence-transformers):
+
+    python -m bertalign.onnx_backend LaBSE ./data/onnx/LaBSE
+
+This writes model.onnx (fp32), model.int8.onnx (dynamic int8 quantisation,
+unless --no-quantize), the tokenizer files and onnx_config.json to the output
+directory. At alignment time only onnxruntime and the tokenizer are needed.
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+CONFIG_FILE = "onnx_config.json"
+
+class OnnxSentenceModel:
+    """
+    Runs an exported sentence-embedding graph with onnxruntime on CPU.
+    Exposes the subset of the SentenceTransformer API used by Encoder:
+    encode(), forward(), tokenizer and max_seq_length.
+    """
+    def __init__(self, model_dir, quantized=True, num_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        onnx_file = model_dir / (INT8_FILE if quantized else FP32_FILE)
+        if not onnx_file.exists():
+            raise FileNotFoundError("{} not found, export it with "
+                                    "`python -m bertalign.onnx_backend`".format(onnx_file))
+        with open(model_dir / CONFIG_FILE, encoding="utf-8") as f:
+            config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(onnx_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = [x.name for x in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_seq_length = config["max_seq_length"]
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        """
+        Encode sentences into normalized float32 embeddings.
+        Args:
+            sentences: list of str.
+            batch_size: int. Number of sentences per session run.
+        Returns:
+            embeddings: numpy array of shape (len(sentences), dim).
+        """
+        out = []
+        for i in range(0, len(sentences), batch_size):
+            features = self.tokenizer(sentences[i:i + batch_size], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            out.append(self.forward(features["input_ids"], features["attention_mask"]))
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(out)
+
+    def forward(self, input_ids, attention_mask):
+        """Embed a padded batch of token ids (numpy arrays of shape (batch, seq))."""
+        features = {"input_ids": input_ids, "attention_mask": attention_mask,
+                    "token_type_ids": np.zeros_like(input_ids)}
+        feed = {name: features[name].astype(np.int64, copy=False) for name in self.input_names}
+        return self.session.run(None, feed)[0].astype(np.float32, copy=False)
+
+def export(model_name, out_dir, quantize=True, opset=14):
+    """
+    Export a SentenceTransformer model (transformer, pooling, dense and
+    normalize layers) to ONNX, and optionally quantize its weights to int8.
+    Args:
+        model_name: str. SentenceTransformer model name or local path.
+        out_dir: str. Directory for the ONNX files and tokenizer.
+        quantize: bool. Also write the dynamically int8-quantized graph.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu").eval()
+
+    sample = st_model.tokenizer(["Export sample.", "Another sample sentence."],
+                                padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, st_model):
+            super().__init__()
+            self.st_model = st_model
+
+        def forward(self, *inputs):
+            return self.st_model(dict(zip(input_names, inputs)))["sentence_embedding"]
+
+    dynamic_axes = {name: {0: "batch", 1: "seq"} for name in input_names}
+    dynamic_axes["sentence_embedding"] = {0: "batch"}
+    fp32_path = out_dir / FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(_Wrapper(st_model), tuple(sample[name] for name in input_names), str(fp32_path),
+                          input_names=input_names, output_names=["sentence_embedding"],
+                          dynamic_axes=dynamic_axes, opset_version=opset)
+    print("Exported {} to {}".format(model_name, fp32_path))
+
+    st_model.tokenizer.save_pretrained(str(out_dir))
+    with open(out_dir / CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump({"model_name": str(model_name), "max_seq_length": st_model.max_seq_length}, f, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = out_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print("Quantized to {} ({:.0f} MB -> {:.0f} MB)".format(
+            int8_path, os.path.getsize(fp32_path) / 2**20, os.path.getsize(int8_path) / 2**20))
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a SentenceTransformer model to ONNX")
+    parser.add_argument("model_name", help="SentenceTransformer model name or local path")
+    parser.add_argument("out_dir", help="Output directory")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 graph")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    export(args.model_name, args.out_dir, quantize=not args.no_quantize, opset=args.opset)
+
+if __name__ == "__main__":
+    main()
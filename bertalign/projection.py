@@ -0,0 +1,74 @@
+import numpy as np
+
+PROJECTIONS = ("pca", "truncate")
+
+class PCAProjection:
+    """
+    PCA projection of sentence embeddings to a smaller dimension.
+    Fit it once on a whole book (both languages) and reuse it for every
+    section, or let Bertalign fit one per section with projection="pca".
+    """
+    def __init__(self, mean, components):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)    # (embedding_size, dim)
+
+    @property
+    def dim(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, vecs, dim):
+        """
+        Args:
+            vecs: numpy array of shape (num_vecs, embedding_size).
+            dim: int. Target dimension, clipped to the rank of vecs.
+        """
+        vecs = np.asarray(vecs, dtype=np.float64)
+        mean = vecs.mean(axis=0)
+        centered = vecs - mean
+        # Eigenvectors of the (embedding_size x embedding_size) covariance,
+        # cheaper than an SVD of the data for book-sized inputs.
+        eigvals, eigvecs = np.linalg.eigh(centered.T @ centered)
+        dim = min(dim, vecs.shape[1], max(vecs.shape[0] - 1, 1))
+        components = eigvecs[:, np.argsort(eigvals)[::-1][:dim]]
+        return cls(mean, components)
+
+    def transform(self, vecs):
+        """Project (..., embedding_size) vectors and re-normalise them."""
+        return _normalize((vecs - self.mean) @ self.components)
+
+    def save(self, path):
+        np.savez(path, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["mean"], data["components"])
+
+def reduce_dim(src_vecs, tgt_vecs, dim, projection="pca"):
+    """
+    Reduce src/tgt embeddings to dim dimensions and re-normalise them.
+    Args:
+        src_vecs: numpy array of shape (max_align-1, num_src_sents, embedding_size).
+        tgt_vecs: numpy array of shape (max_align-1, num_tgt_sents, embedding_size).
+        dim: int. Target dimension.
+        projection: "pca" (fitted on the single sentences of both sides),
+                    "truncate" (keep the first dim components, Matryoshka style)
+                    or a fitted PCAProjection.
+    Returns:
+        src_vecs, tgt_vecs: contiguous float32 arrays of shape (max_align-1, num_sents, dim).
+    """
+    if projection == "truncate":
+        return _normalize(src_vecs[..., :dim]), _normalize(tgt_vecs[..., :dim])
+    if projection == "pca":
+        projection = PCAProjection.fit(np.concatenate((src_vecs[0], tgt_vecs[0])), dim)
+    elif not isinstance(projection, PCAProjection):
+        raise ValueError("Unknown projection {!r}, expected one of {} or a PCAProjection".format(
+            projection, PROJECTIONS))
+    return projection.transform(src_vecs), projection.transform(tgt_vecs)
+
+def _normalize(vecs):
+    vecs = np.ascontiguousarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vecs / norms
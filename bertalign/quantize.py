@@ -0,0 +1,34 @@
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+def quantize(vecs, dtype="float32"):
+    """
+    Convert embeddings to a compact storage dtype.
+    Args:
+        vecs: float32 numpy array of shape (max_align-1, num_sents, embedding_size).
+        dtype: str. "float32" (unchanged), "float16" (half the memory) or
+               "int8" (a quarter, symmetric scaling by the largest component).
+    Returns:
+        vecs: numpy array of the storage dtype.
+        scale: float. Multiply stored values by scale to recover the embeddings.
+    """
+    if dtype == "float32":
+        return np.ascontiguousarray(vecs, dtype=np.float32), 1.0
+    if dtype == "float16":
+        return np.ascontiguousarray(vecs, dtype=np.float16), 1.0
+    if dtype == "int8":
+        max_abs = float(np.abs(vecs).max()) or 1.0
+        scale = max_abs / 127
+        out = np.empty(vecs.shape, dtype=np.int8)
+        # Quantize one overlap layer at a time to avoid a full float temporary
+        for layer in range(vecs.shape[0]):
+            np.rint(vecs[layer] / scale, out=out[layer], casting="unsafe")
+        return out, scale
+    raise ValueError("Unknown embedding dtype {!r}, expected one of {}".format(dtype, EMBEDDING_DTYPES))
+
+def dequantize(vecs, scale=1.0):
+    """Return stored embeddings as float32."""
+    if vecs.dtype == np.int8:
+        return vecs.astype(np.float32) * np.float32(scale)
+    return vecs.astype(np.float32, copy=False)
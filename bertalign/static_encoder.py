@@ -0,0 +1,146 @@
+"""
+Static token-embedding encoder distilled from a SentenceTransformer model.
+
+Every token of our own vocabulary (the tokens that occur in a corpus) is
+embedded once by the full model, as a one-token sentence. At alignment time a
+sentence vector is the frequency-weighted mean of its tokens' rows, which is
+pure NumPy (plus the tokenizer): no transformer pass at inference.
+
+Build the table from local model weights (needs torch and sentence-transformers):
+
+    python -m bertalign.static_encoder LaBSE ./data/static/LaBSE --corpus data/eval/chi/*.txt data/eval/vie/*.txt --dim 256
+
+and select it with encoder_options backend "static", backend_options {"model_dir": ...}.
+"""
+
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from collections import Counter
+
+TABLE_FILE = "table.npy"
+VOCAB_FILE = "vocab.npy"
+WEIGHTS_FILE = "weights.npy"
+CONFIG_FILE = "static_config.json"
+
+class StaticEncoder:
+    """
+    Token-embedding table lookup with weighted mean pooling.
+    Exposes the backend interface used by Encoder: encode(), forward(),
+    tokenizer and max_seq_length.
+    """
+    supports_pool = False
+
+    def __init__(self, model_dir):
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        if not (model_dir / TABLE_FILE).exists():
+            raise FileNotFoundError("{} not found, build it with "
+                                    "`python -m bertalign.static_encoder`".format(model_dir / TABLE_FILE))
+        with open(model_dir / CONFIG_FILE, encoding="utf-8") as f:
+            config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_seq_length = config["max_seq_length"]
+
+        table = np.load(model_dir / TABLE_FILE).astype(np.float32)
+        vocab = np.load(model_dir / VOCAB_FILE)
+        weights = np.load(model_dir / WEIGHTS_FILE).astype(np.float32)
+        # One extra zero row with weight 0 for tokens outside our vocabulary
+        # (and special tokens, which were never part of it).
+        self.table = np.vstack((table, np.zeros((1, table.shape[1]), dtype=np.float32)))
+        self.weights = np.append(weights, np.float32(0))
+        self.rows = np.full(max(len(self.tokenizer), int(vocab.max()) + 1), len(vocab), dtype=np.int32)
+        self.rows[vocab] = np.arange(len(vocab), dtype=np.int32)
+
+    def encode(self, sentences, batch_size=256, **kwargs):
+        """
+        Encode sentences into normalized float32 embeddings.
+        Args:
+            sentences: list of str.
+            batch_size: int. Number of sentences pooled at a time.
+        Returns:
+            embeddings: numpy array of shape (len(sentences), dim).
+        """
+        out = []
+        for i in range(0, len(sentences), batch_size):
+            features = self.tokenizer(sentences[i:i + batch_size], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            out.append(self.forward(features["input_ids"], features["attention_mask"]))
+        if not out:
+            return np.zeros((0, self.table.shape[1]), dtype=np.float32)
+        return np.concatenate(out)
+
+    def forward(self, input_ids, attention_mask):
+        """Pool a padded batch of token ids (numpy arrays of shape (batch, seq))."""
+        rows = self.rows[np.minimum(input_ids, len(self.rows) - 1)]
+        weights = self.weights[rows] * attention_mask
+        vecs = np.einsum("bs,bsd->bd", weights, self.table[rows])
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vecs / norms
+
+def build(model_name, out_dir, corpus_files, dim=None, batch_size=256, sif_a=1e-3, local_files_only=False):
+    """
+    Distill a static token table from a SentenceTransformer model.
+    Args:
+        model_name: str. SentenceTransformer model name or local path.
+        out_dir: str. Output directory for the table, vocabulary and tokenizer.
+        corpus_files: list of paths. Text whose tokens make up the vocabulary.
+        dim: int. Reduce the table to dim dimensions by PCA (None = keep).
+        sif_a: float. Smooth inverse frequency weight a / (a + p(token)).
+    """
+    from bertalign.backends import SentenceTransformerBackend
+    from bertalign.projection import PCAProjection
+
+    backend = SentenceTransformerBackend(model_name, local_files_only=local_files_only)
+    tokenizer = backend.tokenizer
+
+    counts = Counter()
+    for path in corpus_files:
+        lines = [line for line in Path(path).read_text(encoding="utf-8").splitlines() if line.strip()]
+        for ids in tokenizer(lines, add_special_tokens=False)["input_ids"]:
+            counts.update(ids)
+    for special in tokenizer.all_special_ids:
+        counts.pop(special, None)
+    vocab = np.array(sorted(counts), dtype=np.int64)
+    print("Vocabulary: {} tokens from {} files".format(len(vocab), len(corpus_files)))
+
+    table = []
+    for i in range(0, len(vocab), batch_size):
+        batch = [tokenizer.build_inputs_with_special_tokens([int(t)]) for t in vocab[i:i + batch_size]]
+        input_ids = np.array(batch, dtype=np.int64)
+        table.append(backend.forward(input_ids, np.ones_like(input_ids)))
+    table = np.concatenate(table)
+    if dim and dim < table.shape[1]:
+        table = PCAProjection.fit(table, dim).transform(table)
+
+    freqs = np.array([counts[int(t)] for t in vocab], dtype=np.float64)
+    weights = sif_a / (sif_a + freqs / freqs.sum())
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / TABLE_FILE, table.astype(np.float16))
+    np.save(out_dir / VOCAB_FILE, vocab.astype(np.int32))
+    np.save(out_dir / WEIGHTS_FILE, weights.astype(np.float32))
+    tokenizer.save_pretrained(str(out_dir))
+    with open(out_dir / CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump({"model_name": str(model_name), "dim": int(table.shape[1]),
+                   "max_seq_length": backend.max_seq_length, "sif_a": sif_a}, f, indent=2)
+    print("Saved {} x {} table to {}".format(len(vocab), table.shape[1], out_dir))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a static token-embedding encoder")
+    parser.add_argument("model_name", help="SentenceTransformer model name or local path")
+    parser.add_argument("out_dir", help="Output directory")
+    parser.add_argument("--corpus", nargs="+", required=True, help="Text files defining the vocabulary")
+    parser.add_argument("--dim", type=int, default=None, help="PCA dimension (default: model dimension)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--local-files-only", action="store_true", help="Never download the model")
+    args = parser.parse_args()
+    build(args.model_name, args.out_dir, args.corpus, dim=args.dim, batch_size=args.batch_size,
+          local_files_only=args.local_files_only)
+
+if __name__ == "__main__":
+    main()
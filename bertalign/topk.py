@@ -0,0 +1,110 @@
+"""
+Top-k candidate search for the first-pass alignment.
+
+Engines (TOP_K_ENGINES):
+    "band":  exact search restricted to each source sentence's first-pass
+             window, by blocks of NumPy matrix products and argpartition.
+             The first pass ignores candidates outside the window anyway.
+    "flat":  exact search over the whole target with a faiss IndexFlatIP,
+             on GPU when faiss sees one.
+    "hnsw", "ivf": approximate faiss indexes over the whole target, for
+             books whose band is too large to scan.
+    "auto":  "band", or "hnsw" when the band has more than BAND_MAX_CELLS cells.
+"""
+
+import numpy as np
+from sys import platform
+
+TOP_K_ENGINES = ("auto", "band", "flat", "hnsw", "ivf")
+
+# Largest band (sum of the window widths) searched exactly by "auto".
+BAND_MAX_CELLS = 2**28
+# Source sentences per matrix product of the band engine.
+BAND_ROW_BLOCK = 256
+
+HNSW_M = 32
+HNSW_EF_SEARCH = 128
+IVF_NPROBE = 16
+
+# Score faiss reports for missing results (fewer than k candidates).
+MISSING_SCORE = -np.finfo(np.float32).max
+
+def check_engine(engine):
+    if engine not in TOP_K_ENGINES:
+        raise ValueError("Unknown top-k engine {!r}, expected one of {}".format(engine, TOP_K_ENGINES))
+    return engine
+
+def select_engine(engine, starts, ends):
+    """Resolve "auto" from the band size."""
+    if check_engine(engine) != "auto":
+        return engine
+    band_cells = int(np.maximum(ends - starts + 1, 0).sum())
+    return "band" if band_cells <= BAND_MAX_CELLS else "hnsw"
+
+def band_top_k(src_vecs, tgt_vecs, starts, ends, k=3, row_block=BAND_ROW_BLOCK):
+    """
+    Exact top-k target sentences of each source sentence within a window.
+    Args:
+        src_vecs: float32 numpy array of shape (num_src_sents, embedding_size).
+        tgt_vecs: float32 numpy array of shape (num_tgt_sents, embedding_size).
+        starts: numpy array of shape (num_src_sents,). First target index
+                of each source sentence's window (non-decreasing).
+        ends: numpy array of shape (num_src_sents,). Last target index (inclusive).
+        k: int. Number of most similar target sentences.
+        row_block: int. Source sentences per matrix product.
+    Returns:
+        D: numpy array. Similarity score matrix of shape (num_src_sents, k).
+        I: numpy array. Target index matrix of shape (num_src_sents, k),
+           -1 (score MISSING_SCORE) where a window has fewer than k sentences.
+    """
+    src_len = src_vecs.shape[0]
+    D = np.full((src_len, k), MISSING_SCORE, dtype=np.float32)
+    I = np.full((src_len, k), -1, dtype=np.int64)
+    for r_0 in range(0, src_len, row_block):
+        r_1 = min(src_len, r_0 + row_block)
+        lo = max(0, int(starts[r_0:r_1].min()))
+        hi = min(tgt_vecs.shape[0], int(ends[r_0:r_1].max()) + 1)
+        if hi <= lo:
+            continue
+        sims = src_vecs[r_0:r_1] @ tgt_vecs[lo:hi].T
+        cols = np.arange(lo, hi)
+        sims[(cols < starts[r_0:r_1, None]) | (cols > ends[r_0:r_1, None])] = -np.inf
+
+        num = min(k, hi - lo)
+        top = np.argpartition(sims, hi - lo - num, axis=1)[:, hi - lo - num:]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        found = np.isfinite(top_sims)
+        I[r_0:r_1, :num] = np.where(found, top + lo, -1)
+        D[r_0:r_1, :num] = np.where(found, top_sims, MISSING_SCORE)
+    return D, I
+
+def faiss_top_k(src_vecs, tgt_vecs, k=3, engine="flat"):
+    """
+    Top-k target sentences of each source sentence with a faiss index
+    over the whole target ("flat", "hnsw" or "ivf"); see band_top_k.
+    """
+    # faiss takes a noticeable part of `import bertalign` and the default band engine does not need it.
+    import faiss
+    embedding_size = tgt_vecs.shape[1]
+    if engine == "flat":
+        index = faiss.IndexFlatIP(embedding_size)
+        if faiss.get_num_gpus() > 0 and platform == 'linux': # GPU version
+            res = faiss.StandardGpuResources()
+            index = faiss.index_cpu_to_gpu(res, 0, index)
+    elif engine == "hnsw":
+        index = faiss.IndexHNSWFlat(embedding_size, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = max(HNSW_EF_SEARCH, k)
+    elif engine == "ivf":
+        # faiss wants about 39 training vectors per list
+        nlist = max(1, min(int(4 * np.sqrt(len(tgt_vecs))), len(tgt_vecs) // 39))
+        quantizer = faiss.IndexFlatIP(embedding_size)
+        index = faiss.IndexIVFFlat(quantizer, embedding_size, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(tgt_vecs)
+        index.nprobe = min(IVF_NPROBE, nlist)
+    else:
+        raise ValueError("Unknown faiss top-k engine {!r}".format(engine))
+    index.add(tgt_vecs)
+    return index.search(src_vecs, k)
@@ -1,6 +1,5 @@
 import re
-from googletrans import Translator
-from sentence_splitter import SentenceSplitter
+import numpy as np
 
 def clean_text(text):
     clean_text = []
@@ -14,6 +13,8 @@ def clean_text(text):
     return "\n".join(clean_text)
     
 def detect_lang(text):
+    # googletrans (and its HTTP stack) is only needed here, not on `import bertalign`.
+    from googletrans import Translator
     translator = Translator(service_urls=[
       'translate.google.com.hk',
     ])
@@ -29,6 +30,7 @@ def split_sents(text, lang):
         if lang == 'zh':
             sents = _split_zh(text)
         else:
+            from sentence_splitter import SentenceSplitter
             splitter = SentenceSplitter(language=lang)
             sents = splitter.split(text=text) 
             sents = [sent.strip() for sent in sents]
@@ -55,22 +57,61 @@ def _split_zh(text, limit=1000):
 
         return sent_list
         
+MAX_OVERLAP_CHARS = 10000   # limit line so dont encode arbitrarily long sentences
+PAD_WINDOW = ('PAD',)
+
 def yield_overlaps(lines, num_overlaps):
-    lines = [_preprocess_line(line) for line in lines]
-    for overlap in range(1, num_overlaps + 1):
-        for out_line in _layer(lines, overlap):
-            # check must be here so all outputs are unique
-            out_line2 = out_line[:10000]  # limit line so dont encode arbitrarily long sentences
-            yield out_line2
+    for window in yield_overlap_windows(preprocess_lines(lines), num_overlaps):
+        yield overlap_text(window)
 
-def _layer(lines, num_overlaps, comb=' '):
+def yield_overlap_windows(lines, num_overlaps):
+    """
+    Yield the overlaps of preprocessed lines as tuples of their member lines,
+    layer by layer, in the order of yield_overlaps. The first overlap-1 entries
+    of each layer are PAD_WINDOW.
+    """
     if num_overlaps < 1:
         raise Exception('num_overlaps must be >= 1')
-    out = ['PAD', ] * min(num_overlaps - 1, len(lines))
-    for ii in range(len(lines) - num_overlaps + 1):
-        out.append(comb.join(lines[ii:ii + num_overlaps]))
-    return out
-    
+    for overlap in range(1, num_overlaps + 1):
+        for _ in range(min(overlap - 1, len(lines))):
+            yield PAD_WINDOW
+        for ii in range(len(lines) - overlap + 1):
+            yield tuple(lines[ii:ii + overlap])
+
+def overlap_text(window, comb=' '):
+    return comb.join(window)[:MAX_OVERLAP_CHARS]
+
+def overlap_lengths(lines, num_overlaps, comb=' '):
+    """
+    UTF-8 byte lengths of the yield_overlaps lines of preprocessed lines,
+    computed from prefix sums of the line lengths instead of joined strings.
+    Returns:
+        lens: numpy array of shape (num_overlaps, len(lines)).
+    """
+    num_lines = len(lines)
+    byte_sums = np.zeros(num_lines + 1, dtype=np.int64)
+    char_sums = np.zeros(num_lines + 1, dtype=np.int64)
+    np.cumsum([len(line.encode('utf-8')) for line in lines], out=byte_sums[1:])
+    np.cumsum([len(line) for line in lines], out=char_sums[1:])
+
+    lens = np.empty((num_overlaps, num_lines), dtype=np.int64)
+    for overlap in range(1, num_overlaps + 1):
+        num_pads = min(overlap - 1, num_lines)
+        lens[overlap - 1, :num_pads] = len(PAD_WINDOW[0])
+        if overlap > num_lines:
+            continue
+        seps = (overlap - 1) * len(comb)
+        layer = byte_sums[overlap:] - byte_sums[:num_lines + 1 - overlap] + seps
+        # Windows cut at MAX_OVERLAP_CHARS need the real (truncated) string
+        chars = char_sums[overlap:] - char_sums[:num_lines + 1 - overlap] + seps
+        for ii in np.flatnonzero(chars > MAX_OVERLAP_CHARS):
+            layer[ii] = len(overlap_text(lines[ii:ii + overlap], comb).encode('utf-8'))
+        lens[overlap - 1, num_pads:] = layer
+    return lens
+
+def preprocess_lines(lines):
+    return [_preprocess_line(line) for line in lines]
+
 def _preprocess_line(line):
     line = line.strip()
     if len(line) == 0:
@@ -0,0 +1,110 @@
+"""
+Compile the numba kernels of bertalign.corelib ahead of the first alignment.
+
+The kernels are compiled with cache=True, i.e. on first use in every fresh
+environment, which adds seconds to the first aligned section. This runs
+every kernel once on a tiny synthetic section, with the argument types
+Bertalign.align_sents uses for each embedding dtype, so that the machine
+code lands in numba's cache:
+
+    python -m bertalign.warmup [--cache-dir ./data/numba_cache]
+
+Without --cache-dir the cache is NUMBA_CACHE_DIR, or bertalign/__pycache__.
+To ship the cache (e.g. as a Docker build step), run this where the package
+is installed and start the aligner with the same NUMBA_CACHE_DIR. numba
+keys the cache by source file path, modification time and CPU; set
+NUMBA_CPU_NAME=generic for both runs if the image moves between CPU models.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+
+def warmup(dtypes=None, max_align=5, verbose=True):
+    """
+    Compile (or load from cache) the corelib kernels Bertalign.align_sents uses.
+    Args:
+        dtypes: list of str. Embedding storage dtypes (default: all of EMBEDDING_DTYPES).
+        max_align: int. Largest bead (src + tgt sentences); only changes the array sizes.
+    Returns:
+        timings: dict of stage name -> seconds.
+    """
+    from bertalign.corelib import (find_first_search_path, find_second_search_path, first_pass_sparse_align,
+                                   get_alignment_types, second_back_track_beads, second_pass_align,
+                                   second_pass_linear_beads)
+    from bertalign.quantize import EMBEDDING_DTYPES, quantize
+
+    rng = np.random.default_rng(0)
+    src_num, tgt_num, dim = 40, 44, 16
+    num_overlaps = max_align - 1
+    src_vecs = _normalize(rng.standard_normal((num_overlaps, src_num, dim)))
+    tgt_vecs = _normalize(src_vecs[:, np.arange(tgt_num) * src_num // tgt_num]
+                          + 0.1 * rng.standard_normal((num_overlaps, tgt_num, dim)))
+    src_lens = rng.integers(5, 50, size=(num_overlaps, src_num)).astype(np.int64)
+    tgt_lens = rng.integers(5, 50, size=(num_overlaps, tgt_num)).astype(np.int64)
+    char_ratio = np.sum(src_lens[0,]) / np.sum(tgt_lens[0,])
+
+    timings = {}
+    def stage(name, func):
+        start = time.perf_counter()
+        result = func()
+        timings[name] = time.perf_counter() - start
+        if verbose:
+            print("{:<32} {:7.2f} s".format(name, timings[name]))
+        return result
+
+    # Same calls as Bertalign.align_sents.
+    _, first_path = find_first_search_path(src_num, tgt_num)
+    sims = src_vecs[0] @ tgt_vecs[0].T
+    I = np.argsort(-sims, axis=1)[:, :3].astype(np.int64)
+    D = np.take_along_axis(sims, I, axis=1)
+    first_alignment = stage("first pass (sparse)",
+                            lambda: first_pass_sparse_align(src_num, tgt_num, first_path, D, I))
+
+    second_types = get_alignment_types(max_align)
+    second_w, second_path = stage("second search path",
+                                  lambda: find_second_search_path(first_alignment, 5, src_num, tgt_num))
+    for dtype in dtypes or EMBEDDING_DTYPES:
+        src_stored, src_scale = quantize(src_vecs, dtype)
+        tgt_stored, tgt_scale = quantize(tgt_vecs, dtype)
+        for parallel in (False, True):
+            pointers = stage("second pass ({}{})".format(dtype, ", wavefront" if parallel else ""),
+                             lambda: second_pass_align(src_stored, tgt_stored, src_lens, tgt_lens,
+                                                       second_w, second_path, second_types, char_ratio, -0.1,
+                                                       margin=True, len_penalty=True,
+                                                       dot_scale=src_scale * tgt_scale, parallel=parallel))
+    stage("second back-track", lambda: second_back_track_beads(src_num, tgt_num, pointers,
+                                                               second_path, second_types))
+    stage("second pass (linear memory)",
+          lambda: second_pass_linear_beads(src_stored, tgt_stored, src_lens, tgt_lens, second_w, second_path,
+                                           second_types, char_ratio, -0.1, margin=True, len_penalty=True,
+                                           dot_scale=src_scale * tgt_scale))
+    return timings
+
+def _normalize(vecs):
+    return (vecs / np.linalg.norm(vecs, axis=-1, keepdims=True)).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and cache the bertalign numba kernels")
+    parser.add_argument("--cache-dir", default=None,
+                        help="numba cache directory (default: NUMBA_CACHE_DIR or bertalign/__pycache__)")
+    args = parser.parse_args()
+
+    if args.cache_dir:
+        cache_dir = os.path.abspath(args.cache_dir)
+        if os.environ.get("NUMBA_CACHE_DIR") != cache_dir:
+            # numba reads NUMBA_CACHE_DIR when the kernels are defined, which
+            # happened on `import bertalign`: run again with it set.
+            env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+            sys.exit(subprocess.call([sys.executable, "-m", "bertalign.warmup"], env=env))
+
+    import numba
+    timings = warmup()
+    print("Compiled bertalign kernels in {:.2f} s, cache: {}".format(
+        sum(timings.values()), numba.config.CACHE_DIR or "bertalign/__pycache__"))
+
+if __name__ == "__main__":
+    main()
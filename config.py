@@ -49,6 +49,26 @@ class GeneratorConfig:
         "margin": True,         # enable margin-based scoring.
         "len_penalty": True,   # penalize alignments with large difference in length.
         "is_split": True,       # condition check if paragraphs is slitted into sentences.
+        "dim": None,            # reduce embeddings to this many dimensions before alignment (None = keep all).
+        "projection": "pca",    # dimension reduction: "pca" (fitted per section) or "truncate".
+        "vec_dtype": "float32", # embedding storage: "float32", "float16" or "int8" (scaled).
+        "top_k_engine": "auto", # candidate search: "auto", "band", "flat", "hnsw" or "ivf" (bertalign.topk).
+        "dp_memory_budget": 2**24 * 73, # bytes (2**24 band cells at max_align=6); larger second-pass DP tables use the linear-memory mode (None = never).
+    }
+
+    # Encoder options
+    encoder_options = {
+        "model_name": "LaBSE",                   # SentenceTransformer model name or local path
+        "cache_dir": None,                       # persistent embedding cache, e.g. "./data/embedding_cache" (None = disabled)
+        "batch_size": 64,                        # max sentences per forward pass
+        "token_budget": 8192,                    # max padded tokens per batch, sorted by length (None = fixed batches)
+        "num_workers": 0,                        # CPU encoding processes, each with its own model copy (0 = in-process)
+        "backend": "sentence-transformers",      # "sentence-transformers", "local", "onnx", "onnx-int8", "static" or "hashing" (bertalign.backends)
+        "onnx_dir": "./data/onnx/LaBSE",         # ONNX export for the onnx backends (python -m bertalign.onnx_backend)
+        "compose_overlaps": False,               # approximate multi-sentence windows from single-sentence vectors
+        "chunk_size": 8192,                      # overlaps generated and encoded at a time
+        "memmap_dir": None,                      # write embeddings to memory-mapped temp files here (None = RAM)
+        "backend_options": {},                   # extra backend arguments, e.g. {"dim": 256} for "hashing", {"model_dir": ...} for "static"
     }
 
     # Logging
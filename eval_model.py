@@ -9,7 +9,7 @@ import os
 from config import GeneratorConfig
 from preprocessor import QuocNguPreprocessor, SinoNomPreprocessor
 from bertalign.eval import *
-from bertalign import Bertalign
+from bertalign import Bertalign, model
 
 
 def save_txt(text, file_path):
@@ -94,36 +94,45 @@ def create_eval_data_from_excel(excel_path: Path, output_folder: Path) -> None:
         save_txt(vie_para,vie_path)
             
     
-def main() -> None:
-    excel_path = Path("./data/Golden_CnVn_alignment/tqdn1_ch_vn.xlsx")
-    output_folder = Path("./data/eval")
-    
-    excel_path.parent.mkdir(parents=True, exist_ok=True)
-    output_folder.mkdir(parents=True, exist_ok=True)
-    
-    create_eval_data_from_excel(excel_path, output_folder)
-    
-    src_dir = output_folder / "chi"
-    tgt_dir = output_folder / "vie"
-    gold_dir = output_folder / "gold"
+def evaluate(eval_folder: Path, **align_options) -> dict:
+    """
+    Align every chi/vie file pair in eval_folder and score it against the gold alignments.
+    align_options are passed on to Bertalign (e.g. dim, projection).
+    """
+    src_dir = eval_folder / "chi"
+    tgt_dir = eval_folder / "vie"
+    gold_dir = eval_folder / "gold"
     
     test_alignments = []
     gold_alignments = []
-    for file in os.listdir(src_dir):
+    for file in sorted(os.listdir(src_dir)):
         src_file = os.path.join(src_dir, file).replace("\\","/")
         tgt_file = os.path.join(tgt_dir, file).replace("\\","/")
         src = open(src_file, 'rt', encoding='utf-8').read()
         tgt = open(tgt_file, 'rt', encoding='utf-8').read()
 
         print("Start aligning {} to {}".format(src_file, tgt_file))
-        aligner = Bertalign(src, tgt, is_split=True)
+        aligner = Bertalign(src, tgt, is_split=True, **align_options)
         aligner.align_sents()
         test_alignments.append(aligner.result)
 
         gold_file = os.path.join(gold_dir, file)
         gold_alignments.append(read_alignments(gold_file))
     
-    scores = score_multiple(gold_list=gold_alignments, test_list=test_alignments)
+    return score_multiple(gold_list=gold_alignments, test_list=test_alignments)
+
+
+def main() -> None:
+    excel_path = Path("./data/Golden_CnVn_alignment/tqdn1_ch_vn.xlsx")
+    output_folder = Path("./data/eval")
+    
+    excel_path.parent.mkdir(parents=True, exist_ok=True)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    
+    create_eval_data_from_excel(excel_path, output_folder)
+    model.configure(**GeneratorConfig().encoder_options)
+    
+    scores = evaluate(output_folder)
     log_final_scores(scores)
 
     
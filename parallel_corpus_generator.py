@@ -8,7 +8,7 @@ from underthesea import word_tokenize
 from config import GeneratorConfig, LoggerMixin
 from pdf_extractor import SinoNomPDFExtractor, QuocNguPDFExtractor
 from preprocessor import QuocNguPreprocessor, SinoNomPreprocessor
-from bertalign import Bertalign
+from bertalign import Bertalign, model
 from xml_builder import XMLBuilder
 
 
@@ -16,6 +16,7 @@ class ParallelCorpusGenerator(LoggerMixin):
     def __init__(self, config: GeneratorConfig):
         super().__init__(logger_name=self.__class__.__name__, log_level=config.log_level)        
         self.config = config
+        model.configure(**self.config.encoder_options)
 
         self.sinonom_pdf_extractor = SinoNomPDFExtractor(
             file_path=self.config.sinonom_pdf_path, 
@@ -95,6 +96,14 @@ class ParallelCorpusGenerator(LoggerMixin):
             self.logger.info(f"Successfully extracted text from page {self.config.quocngu_start_page} to {end_page} from Vietnamese PDF text.")
 
     def align_and_save_sections(self, sect_ids: Optional[List] = None):
+        # Keep the encoding pool (if any) alive across all sections of this run
+        model.start_pool()
+        try:
+            self._align_and_save_sections(sect_ids)
+        finally:
+            model.stop_pool()
+
+    def _align_and_save_sections(self, sect_ids: List):
         for sect_id in sect_ids:
             sect_id = str(sect_id)
             if sect_id in self.sinonom_sections.keys() and sect_id in self.quocngu_sections.keys():
@@ -115,7 +124,12 @@ class ParallelCorpusGenerator(LoggerMixin):
                     self.config.align_options['skip'],
                     self.config.align_options['margin'],
                     self.config.align_options['len_penalty'],
-                    self.config.align_options['is_split'])
+                    self.config.align_options['is_split'],
+                    dim=self.config.align_options['dim'],
+                    projection=self.config.align_options['projection'],
+                    vec_dtype=self.config.align_options['vec_dtype'],
+                    top_k_engine=self.config.align_options['top_k_engine'],
+                    dp_memory_budget=self.config.align_options['dp_memory_budget'])
                 aligner.align_sents()
         
                 if self.config.verbose: 
@@ -1,7 +1,7 @@
 
 import re
 from pathlib import Path
-from typing import List
+from typing import Iterable, List, Optional, Tuple
 import unicodedata
 # from opencc import OpenCC
 
@@ -9,8 +9,25 @@ from quocngu_normalizer.text_cleaner import TextCleaner
 
 
 class QuocNguPreprocessor:
-    def __init__(self, config_path=None):
+    # A sentence body (stripped) followed by its run of ending punctuation, or by the end of text
+    SENTENCE_PATTERN = re.compile(r'\s*(?P<body>(?:[^.!?]*[^.!?\s])?)\s*(?P<end>[.!?]+|\Z)')
+    ELLIPSIS_SENTENCE_PATTERN = re.compile(r'\s*(?P<body>(?:[^.!?…]*[^.!?…\s])?)\s*(?P<end>[.!?…]+|\Z)')
+    # Whitespace that differs from the normalized form: runs, non-space characters, or before an ending
+    IRREGULAR_SPACE_PATTERN = re.compile(r'\s\s|[^\S ]|\s(?=[.!?…])')
+    SPACE_BEFORE_END_PATTERN = re.compile(r'\s+(?=[.!?])')
+    SPACE_BEFORE_ELLIPSIS_END_PATTERN = re.compile(r'\s+(?=[.!?…])')
+    SPACE_PATTERN = re.compile(r'\s+')
+
+    def __init__(self, config_path=None, abbreviations: Optional[Iterable[str]] = None, ellipsis_aware: bool = False):
+        """
+        Args:
+            config_path: noise pattern JSON for the QuocNgu text cleaner.
+            abbreviations: words (with or without the final '.') that do not end a sentence, e.g. ["TP", "Th"].
+            ellipsis_aware: treat "..." / "…" followed by a lowercase word as a pause, not a sentence end.
+        """
         self.cleaner = TextCleaner(config_path=Path(config_path))
+        self.abbreviations = {a.rstrip('.').lower() for a in abbreviations} if abbreviations else set()
+        self.ellipsis_aware = ellipsis_aware
     
     def normalize(self, text: str) -> str:
         norm_text = self.cleaner.clean_text(text)
@@ -21,44 +38,71 @@ class QuocNguPreprocessor:
         Split a Vietnamese text into sentences.
         Uses regex to identify sentence boundaries based on punctuation marks.
         """
-        if not text.strip():
-            return []
+        return [sent for sent, _, _ in self.split_sents_with_offsets(text)]
 
-        # Remove extra whitespace and normalize the text
-        text = re.sub(r'\s+', ' ', text.strip())
-
-        # Define sentence ending patterns for Vietnamese text
-        sentence_endings = r'[.!?]+'
+    def split_sents_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Split a Vietnamese text into sentences with a single regex scan.
 
-        # Split by sentence endings and keep the punctuation
-        parts = re.split(f'({sentence_endings})', text)
+        Returns (sentence, start, end) tuples where text[start:end] is the sentence
+        span in the input text. When the input whitespace is already normalized
+        (as produced by normalize()) the sentence is exactly that slice; otherwise
+        whitespace runs are collapsed and spaces before the ending punctuation dropped.
+        Very short sentences (likely fragments) are filtered out.
+        """
+        if self.ellipsis_aware:
+            pattern, space_before_end = self.ELLIPSIS_SENTENCE_PATTERN, self.SPACE_BEFORE_ELLIPSIS_END_PATTERN
+        else:
+            pattern, space_before_end = self.SENTENCE_PATTERN, self.SPACE_BEFORE_END_PATTERN
+        needs_fixup = self.IRREGULAR_SPACE_PATTERN.search(text) is not None
+        merging = bool(self.abbreviations) or self.ellipsis_aware
 
         result = []
-        current_sentence = ""
-
-        for part in parts:
-            part = part.strip()
-            if not part:
+        start = -1      # start of the sentence being built, -1 if none
+        for match in pattern.finditer(text):
+            body_start, body_end = match.span('body')
+            end_start, end_end = match.span('end')
+            if body_start == body_end and end_start == end_end:
+                continue    # empty match at the end of text
+            if start < 0:
+                start = body_start
+            if merging and end_end > end_start and self._is_inner_boundary(text, body_start, body_end, end_start, end_end):
                 continue
 
-            if re.match(f'^{sentence_endings}$', part):
-                # This is sentence ending
-                current_sentence += part
-                if current_sentence.strip():
-                    result.append(current_sentence.strip())
-                current_sentence = ""
-            else:
-                # This is text
-                current_sentence += part
+            end = end_end if end_end > end_start else body_end
+            sent = text[start:end]
+            if needs_fixup:
+                sent = self.SPACE_PATTERN.sub(' ', space_before_end.sub('', sent))
+
+            # Filter out very short sentences (likely fragments)
+            if len(sent) > 2:
+                result.append((sent, start, end))
+            start = -1
+
+        if start >= 0:
+            # text ended right after an abbreviation or ellipsis
+            end = len(text.rstrip())
+            sent = text[start:end]
+            if needs_fixup:
+                sent = self.SPACE_PATTERN.sub(' ', space_before_end.sub('', sent))
+            if len(sent) > 2:
+                result.append((sent, start, end))
 
-        # Add any remaining sentence
-        if current_sentence.strip():
-            result.append(current_sentence.strip())
+        return result
 
-        # Filter out very short sentences (likely fragments)
-        result = [s for s in result if len(s.strip()) > 2]
+    def _is_inner_boundary(self, text: str, body_start: int, body_end: int, end_start: int, end_end: int) -> bool:
+        """Check whether the punctuation run after body is an abbreviation dot or a mid-sentence ellipsis."""
+        end = text[end_start:end_end]
+        if end == '.' and self.abbreviations and body_end == end_start:
+            last_word = text[body_start:body_end].rsplit(None, 1)[-1] if body_end > body_start else ''
+            if last_word.lower() in self.abbreviations:
+                return True
 
-        return result
+        if self.ellipsis_aware and (end == '…' or (len(end) > 1 and end.strip('.') == '')):
+            next_text = text[end_end:end_end + 2].lstrip()
+            return bool(next_text) and next_text[0].islower()
+
+        return False
 
     def norm_and_split_sents(self, text: str) -> List:
         norm_text = self.normalize(text)
@@ -3,6 +3,7 @@
 import logging
 import re
 from dataclasses import dataclass
+from functools import cached_property
 
 
 @dataclass(frozen=True)
@@ -23,16 +24,37 @@ class CleaningConfig:
     log_level: str = 'INFO'
     log_format: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-    @property
+    # Patterns are compiled once per config instance; cached_property writes to
+    # the instance __dict__ directly, so it works on the frozen dataclass.
+    @cached_property
     def valid_token_pattern(self) -> re.Pattern:
         """Compiled regex pattern for valid tokens."""
         return re.compile(rf'^[{self.VIETNAMESE_CHARS}{self.PUNCTUATION}]+$', re.UNICODE)
 
-    @property
+    @cached_property
     def punctuation_only_pattern(self) -> re.Pattern:
         """Compiled regex pattern for punctuation-only tokens."""
         return re.compile(rf'^[{self.PUNCTUATION}]+$', re.UNICODE)
 
+    @cached_property
+    def valid_token_lines_pattern(self) -> re.Pattern:
+        """Compiled regex pattern matching valid tokens in newline-joined token text.
+
+        Length constraints are part of the pattern, so a single findall over
+        the tokens joined with newlines returns exactly the valid tokens, in order.
+        """
+        return re.compile(
+            rf'^[{self.VIETNAMESE_CHARS}{self.PUNCTUATION}]'
+            rf'{{{self.min_word_length},{self.max_word_length}}}$',
+            re.UNICODE | re.MULTILINE)
+
+    @cached_property
+    def word_core_lines_pattern(self) -> re.Pattern:
+        """Compiled regex pattern capturing each word of newline-joined text without edge punctuation."""
+        return re.compile(
+            rf'^[{self.PUNCTUATION}]*(.*?)[{self.PUNCTUATION}]*$',
+            re.UNICODE | re.MULTILINE)
+
 
 class LoggerMixin:
     """Mixin to provide consistent logging capabilities."""
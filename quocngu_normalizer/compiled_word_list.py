@@ -0,0 +1,198 @@
+"""Memory-mapped, precompiled word list for fast dictionary loading."""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from quocngu_normalizer.exceptions import DictionaryError
+
+# Header: magic, format version, flags, source size, source mtime (ns),
+# number of words, size of the UTF-8 blob.
+_HEADER = struct.Struct('<4sHHQQII')
+_MAGIC = b'QNWL'
+_VERSION = 2
+_FLAG_CASE_SENSITIVE = 1
+_FLAG_BIG_ENDIAN = 2
+
+
+class CompiledWordList:
+    """
+    Sorted, immutable word list stored as UTF-8 blob plus an offsets table.
+
+    The on-disk layout is
+    ``header | offsets (uint32 * (count + 1)) | slots (uint32 * table size) | blob``.
+    Words are sorted by their UTF-8 bytes, so prefix lookups are binary
+    searches over the memory-mapped file. Exact lookups, the hot path of
+    normalization, probe ``slots``: an open-addressing hash table (CRC-32,
+    linear probing) of word index + 1, 0 marking an empty slot. Both run on
+    the mapped pages, which worker processes share; nothing per-process is
+    built on top of them.
+    """
+
+    def __init__(self, buffer, case_sensitive: bool = False):
+        self._buffer = buffer
+        self.case_sensitive = case_sensitive
+
+        _, _, _, _, _, count, blob_size = _HEADER.unpack_from(buffer, 0)
+        offsets_end = _HEADER.size + 4 * (count + 1)
+        # The hash table fills the space between the offsets and the blob
+        slots_end = len(buffer) - blob_size
+        self._offsets = memoryview(buffer)[_HEADER.size:offsets_end].cast('I')
+        self._slots = memoryview(buffer)[offsets_end:slots_end].cast('I')
+        self._mask = len(self._slots) - 1
+        self._blob_start = slots_end
+        self._count = count
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], case_sensitive: bool = False) -> 'CompiledWordList':
+        """Build an in-memory word list (no file involved)."""
+        return cls(_serialize(words, case_sensitive), case_sensitive)
+
+    @classmethod
+    def open(cls, path: Path) -> 'CompiledWordList':
+        """Memory-map a compiled word list from disk."""
+        with path.open('rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        flags = _HEADER.unpack_from(buffer, 0)[2]
+        return cls(buffer, bool(flags & _FLAG_CASE_SENSITIVE))
+
+    @staticmethod
+    def is_fresh(path: Path, source_path: Path, case_sensitive: bool) -> bool:
+        """Check whether a compiled file exists and matches its JSON source."""
+        try:
+            with path.open('rb') as f:
+                header = f.read(_HEADER.size)
+            stat = source_path.stat()
+        except OSError:
+            return False
+
+        if len(header) != _HEADER.size:
+            return False
+        magic, version, flags, src_size, src_mtime, _, _ = _HEADER.unpack(header)
+        return (magic == _MAGIC
+                and version == _VERSION
+                and flags == _make_flags(case_sensitive)
+                and src_size == stat.st_size
+                and src_mtime == stat.st_mtime_ns)
+
+    @staticmethod
+    def write(path: Path, words: Iterable[str], source_path: Path, case_sensitive: bool) -> None:
+        """Compile words to ``path`` atomically, stamped with the source file's size and mtime."""
+        stat = source_path.stat()
+        data = _serialize(words, case_sensitive, stat.st_size, stat.st_mtime_ns)
+
+        tmp_name = None
+        try:
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            if tmp_name and os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise DictionaryError(f"Failed to write compiled dictionary {path}: {e}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._word(i).decode('utf-8')
+
+    def __contains__(self, word: str) -> bool:
+        key = self._normalize(word)
+        slots, mask, offsets = self._slots, self._mask, self._offsets
+        start = self._blob_start
+        slot = zlib.crc32(key) & mask
+        while True:
+            index = slots[slot]
+            if not index:
+                return False
+            # index is word number + 1, so the word spans offsets[index - 1]:offsets[index]
+            if self._buffer[start + offsets[index - 1]:start + offsets[index]] == key:
+                return True
+            slot = (slot + 1) & mask
+
+    def with_prefix(self, prefix: str, limit: Optional[int] = None) -> Iterator[str]:
+        """Yield words starting with ``prefix`` in sorted (UTF-8 byte) order."""
+        key = self._normalize(prefix)
+        i = self._lower_bound(key)
+        found = 0
+        while i < self._count and (limit is None or found < limit):
+            word = self._word(i)
+            if not word.startswith(key):
+                break
+            yield word.decode('utf-8')
+            found += 1
+            i += 1
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Check whether any word starts with ``prefix``."""
+        return next(self.with_prefix(prefix, limit=1), None) is not None
+
+    def _normalize(self, word: str) -> bytes:
+        word = word if self.case_sensitive else word.lower()
+        return word.encode('utf-8')
+
+    def _word(self, i: int) -> bytes:
+        start = self._blob_start
+        return self._buffer[start + self._offsets[i]:start + self._offsets[i + 1]]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+def _make_flags(case_sensitive: bool) -> int:
+    flags = _FLAG_CASE_SENSITIVE if case_sensitive else 0
+    if sys.byteorder == 'big':
+        flags |= _FLAG_BIG_ENDIAN
+    return flags
+
+
+def _table_size(count: int) -> int:
+    """Number of hash slots for count words: a power of two, at most half full."""
+    size = 1
+    while size < 2 * count:
+        size *= 2
+    return size
+
+
+def _serialize(words: Iterable[str], case_sensitive: bool, src_size: int = 0, src_mtime: int = 0) -> bytes:
+    """Serialize words into the compiled layout (offsets use native uint32)."""
+    encoded = sorted({w.encode('utf-8') for w in words})
+    blob = b''.join(encoded)
+
+    offsets = array('I', [0])
+    position = 0
+    for word in encoded:
+        position += len(word)
+        offsets.append(position)
+
+    slots = array('I', bytes(4 * _table_size(len(encoded))))
+    mask = len(slots) - 1
+    for index, word in enumerate(encoded, 1):
+        slot = zlib.crc32(word) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = index
+
+    header = _HEADER.pack(_MAGIC, _VERSION, _make_flags(case_sensitive),
+                          src_size, src_mtime, len(encoded), len(blob))
+    return header + offsets.tobytes() + slots.tobytes() + blob
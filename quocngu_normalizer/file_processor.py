@@ -137,11 +137,15 @@ class FileProcessor(LoggerMixin):
         extensions: List[str] = ['.txt'],
         recursive: bool = False,
         verbose: bool = False,
-        progress_callback=None
+        progress_callback=None,
+        aggregator=None  # StatisticsAggregator - streams per-file stats instead of collecting them
     ) -> Tuple[List[Dict], int, int, List[Dict]]:
         """
         Process all text files in a folder through the cleaning pipeline.
 
+        When an aggregator is given, each file's statistics are passed to
+        aggregator.update() as soon as it finishes and file_statistics stays empty.
+
         Returns:
             Tuple of (file_statistics, total_original_length, total_cleaned_length, failed_files)
         """
@@ -196,7 +200,10 @@ class FileProcessor(LoggerMixin):
                     'reduction_percent': reduction,
                     'detailed_stats': stats
                 }
-                file_statistics.append(file_stat)
+                if aggregator is not None:
+                    aggregator.update(file_stat)
+                else:
+                    file_statistics.append(file_stat)
 
                 total_original_length += original_len
                 total_cleaned_length += cleaned_len
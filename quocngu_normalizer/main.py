@@ -9,7 +9,7 @@ from pathlib import Path
 
 from text_cleaner import TextCleaner
 from file_processor import FileProcessor
-from statistics import StatisticsReporter
+from statistics import StatisticsAggregator, StatisticsReporter
 from exceptions import ConfigurationError, DictionaryError, FileProcessingError
 
 
@@ -45,6 +45,8 @@ def create_argument_parser() -> argparse.ArgumentParser:
                         help='File extensions to process (default: .txt)')
     parser.add_argument('--recursive', '-r', action='store_true',
                         help='Process files recursively in subdirectories')
+    parser.add_argument('-s', '--stats-file', type=Path,
+                        help='JSONL file for per-file statistics (default: <output_folder>/file_statistics.jsonl)')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Enable verbose output')
 
@@ -85,6 +87,7 @@ def main() -> None:
         )
         processor = FileProcessor(encoding=args.encoding)
         reporter = StatisticsReporter()
+        stats_file = args.stats_file or output_folder / 'file_statistics.jsonl'
 
         # Set up progress callback for verbose mode
         callback = progress_callback if args.verbose else None
@@ -95,24 +98,26 @@ def main() -> None:
         print(f"Extensions: {args.extensions}")
         print(f"Recursive: {args.recursive}")
 
-        # Process the entire folder
-        file_statistics, total_original_length, total_cleaned_length, failed_files = processor.process_folder(
-            input_folder=input_folder,
-            output_folder=output_folder,
-            cleaner=cleaner,
-            extensions=args.extensions,
-            recursive=args.recursive,
-            verbose=args.verbose,
-            progress_callback=callback
-        )
+        # Process the entire folder, streaming per-file statistics to disk
+        with StatisticsAggregator(details_path=stats_file) as aggregator:
+            _, total_original_length, total_cleaned_length, failed_files = processor.process_folder(
+                input_folder=input_folder,
+                output_folder=output_folder,
+                cleaner=cleaner,
+                extensions=args.extensions,
+                recursive=args.recursive,
+                verbose=args.verbose,
+                progress_callback=callback,
+                aggregator=aggregator
+            )
 
         # Generate reports
-        reporter.generate_report(file_statistics, total_original_length,
+        reporter.generate_report(aggregator, total_original_length,
                                  total_cleaned_length, output_folder, failed_files, input_folder)
 
-        if args.verbose and file_statistics:
+        if args.verbose and aggregator.files_processed:
             reporter.generate_detailed_report(
-                file_statistics, total_original_length, total_cleaned_length, show_chart=True)
+                aggregator, total_original_length, total_cleaned_length, show_chart=True)
 
         sys.exit(0)
 
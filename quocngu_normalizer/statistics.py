@@ -2,131 +2,200 @@
 Statistical analysis and reporting for Vietnamese OCR text cleaning.
 """
 
-from typing import List, Dict
+import heapq
+import json
+from typing import List, Dict, Optional, Union
 from pathlib import Path
 
+import numpy as np
+
 # No matplotlib - console reports only
 HAS_MATPLOTLIB = False
 
 
+class StatisticsAggregator:
+    """Incrementally aggregates per-file statistics so nothing per-file is kept in memory.
+
+    Running totals and NumPy histograms are updated as each file finishes. Per-file
+    records are streamed to an optional JSONL file, and only the top rows (by
+    reduction) are kept for the console table.
+    """
+
+    REDUCTION_BINS = np.linspace(0, 100, 21)            # 5% buckets
+    SENTENCE_LENGTH_BINS = np.arange(0, 310, 10)        # chars/sentence, 10-char buckets
+
+    def __init__(self, details_path: Optional[Path] = None, max_table_rows: int = 50):
+        self.details_path = details_path
+        self.max_table_rows = max_table_rows
+        self._details_file = None
+        if details_path:
+            details_path.parent.mkdir(parents=True, exist_ok=True)
+            self._details_file = details_path.open('w', encoding='utf-8')
+
+        self.files_processed = 0
+        self.total_original_length = 0
+        self.total_cleaned_length = 0
+        self.reduction_sum = 0.0
+        self.reduction_min = float('inf')
+        self.reduction_max = float('-inf')
+
+        # Sentence statistics, counted over files that contain sentences
+        self.files_with_sentences = 0
+        self.total_original_sentences = 0
+        self.total_cleaned_sentences = 0
+        self.total_original_words = 0
+        self.total_cleaned_words = 0
+        # Per-file averages: [orig_char, clean_char, orig_word, clean_word] sums and counts
+        self._avg_sums = np.zeros(4, dtype=np.float64)
+        self._avg_counts = np.zeros(4, dtype=np.int64)
+
+        self.reduction_histogram = np.zeros(len(self.REDUCTION_BINS) - 1, dtype=np.int64)
+        self.sentence_length_histogram = np.zeros(len(self.SENTENCE_LENGTH_BINS) - 1, dtype=np.int64)
+
+        self._top_rows = []     # min-heap of (reduction, seq, row)
+
+    @classmethod
+    def from_file_stats(cls, file_stats: List[Dict], **kwargs) -> 'StatisticsAggregator':
+        """Build an aggregator from an in-memory list of file statistics."""
+        aggregator = cls(**kwargs)
+        for stat in file_stats:
+            aggregator.update(stat)
+        aggregator.close()
+        return aggregator
+
+    def update(self, stat: Dict) -> None:
+        """Add the statistics of one processed file."""
+        reduction = stat['reduction_percent']
+        self.files_processed += 1
+        self.total_original_length += stat['original_length']
+        self.total_cleaned_length += stat['cleaned_length']
+        self.reduction_sum += reduction
+        self.reduction_min = min(self.reduction_min, reduction)
+        self.reduction_max = max(self.reduction_max, reduction)
+        self.reduction_histogram[self._bin(self.REDUCTION_BINS, reduction)] += 1
+
+        detailed_stats = stat.get('detailed_stats', {})
+        orig_sentences = detailed_stats.get('original_sentences', 0)
+        clean_sentences = detailed_stats.get('cleaned_sentences', 0)
+
+        if orig_sentences > 0:  # Only include files with sentences
+            self.files_with_sentences += 1
+            self.total_original_sentences += orig_sentences
+            self.total_cleaned_sentences += clean_sentences
+            self.total_original_words += detailed_stats.get('original_words', 0)
+            self.total_cleaned_words += detailed_stats.get('cleaned_words', 0)
+
+            averages = np.array([
+                detailed_stats.get('original_average_sentence_length', 0),
+                detailed_stats.get('cleaned_average_sentence_length', 0),
+                detailed_stats.get('original_words_per_sentence', 0),
+                detailed_stats.get('cleaned_words_per_sentence', 0),
+            ], dtype=np.float64)
+            positive = averages > 0
+            self._avg_sums += np.where(positive, averages, 0)
+            self._avg_counts += positive
+
+            if averages[1] > 0:
+                self.sentence_length_histogram[self._bin(self.SENTENCE_LENGTH_BINS, averages[1])] += 1
+
+        row = (stat['filename'], stat['original_length'], stat['cleaned_length'],
+               reduction, orig_sentences, clean_sentences)
+        entry = (reduction, self.files_processed, row)
+        if len(self._top_rows) < self.max_table_rows:
+            heapq.heappush(self._top_rows, entry)
+        elif reduction > self._top_rows[0][0]:
+            heapq.heapreplace(self._top_rows, entry)
+
+        if self._details_file:
+            self._details_file.write(json.dumps(stat, ensure_ascii=False) + '\n')
+
+    def close(self) -> None:
+        """Flush and close the per-file details stream."""
+        if self._details_file:
+            self._details_file.close()
+            self._details_file = None
+
+    def __enter__(self) -> 'StatisticsAggregator':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def average_reduction(self) -> float:
+        return self.reduction_sum / self.files_processed if self.files_processed else 0
+
+    def top_rows(self) -> List[tuple]:
+        """Rows (filename, original, cleaned, reduction, orig_sents, clean_sents) sorted by reduction."""
+        return [row for _, _, row in sorted(self._top_rows, key=lambda e: (-e[0], e[1]))]
+
+    def sentence_statistics(self) -> Dict:
+        """Aggregate sentence statistics over all files that contain sentences."""
+        averages = np.divide(self._avg_sums, self._avg_counts,
+                             out=np.zeros(4), where=self._avg_counts > 0)
+        return {
+            'total_original_sentences': self.total_original_sentences,
+            'total_cleaned_sentences': self.total_cleaned_sentences,
+            'total_original_words': self.total_original_words,
+            'total_cleaned_words': self.total_cleaned_words,
+            'overall_orig_char_avg': float(averages[0]),
+            'overall_clean_char_avg': float(averages[1]),
+            'overall_orig_word_avg': float(averages[2]),
+            'overall_clean_word_avg': float(averages[3]),
+            'files_count': self.files_with_sentences
+        }
+
+    @staticmethod
+    def _bin(edges: np.ndarray, value: float) -> int:
+        """Histogram bucket of value, clipping out-of-range values to the edge buckets."""
+        index = int(np.searchsorted(edges, value, side='right')) - 1
+        return min(max(index, 0), len(edges) - 2)
+
+
 class StatisticsReporter:
     """Handles statistics calculation and console reporting for text cleaning results."""
 
     def __init__(self):
         self.has_matplotlib = HAS_MATPLOTLIB
 
-    def _extract_sentence_statistics(self, file_stats: List[Dict]) -> Dict:
-        """Extract and aggregate sentence statistics from all processed files."""
-        total_original_sentences = 0
-        total_cleaned_sentences = 0
-        total_original_words = 0
-        total_cleaned_words = 0
-
-        files_with_sentences = []
-        original_char_lengths = []
-        cleaned_char_lengths = []
-        original_word_lengths = []
-        cleaned_word_lengths = []
-
-        for stat in file_stats:
-            detailed_stats = stat.get('detailed_stats', {})
-
-            # Extract sentence counts
-            orig_sentences = detailed_stats.get('original_sentences', 0)
-            clean_sentences = detailed_stats.get('cleaned_sentences', 0)
-
-            # Extract word counts
-            orig_words = detailed_stats.get('original_words', 0)
-            clean_words = detailed_stats.get('cleaned_words', 0)
-
-            # Extract average sentence lengths
-            orig_char_avg = detailed_stats.get(
-                'original_average_sentence_length', 0)
-            clean_char_avg = detailed_stats.get(
-                'cleaned_average_sentence_length', 0)
-            orig_word_avg = detailed_stats.get(
-                'original_words_per_sentence', 0)
-            clean_word_avg = detailed_stats.get(
-                'cleaned_words_per_sentence', 0)
-
-            if orig_sentences > 0:  # Only include files with sentences
-                total_original_sentences += orig_sentences
-                total_cleaned_sentences += clean_sentences
-                total_original_words += orig_words
-                total_cleaned_words += clean_words
-
-                files_with_sentences.append({
-                    'filename': stat['filename'],
-                    'original_sentences': orig_sentences,
-                    'cleaned_sentences': clean_sentences,
-                    'original_char_avg': orig_char_avg,
-                    'cleaned_char_avg': clean_char_avg,
-                    'original_word_avg': orig_word_avg,
-                    'cleaned_word_avg': clean_word_avg
-                })
-
-                if orig_char_avg > 0:
-                    original_char_lengths.append(orig_char_avg)
-                if clean_char_avg > 0:
-                    cleaned_char_lengths.append(clean_char_avg)
-                if orig_word_avg > 0:
-                    original_word_lengths.append(orig_word_avg)
-                if clean_word_avg > 0:
-                    cleaned_word_lengths.append(clean_word_avg)
-
-        # Calculate overall averages
-        overall_orig_char_avg = sum(
-            original_char_lengths) / len(original_char_lengths) if original_char_lengths else 0
-        overall_clean_char_avg = sum(
-            cleaned_char_lengths) / len(cleaned_char_lengths) if cleaned_char_lengths else 0
-        overall_orig_word_avg = sum(
-            original_word_lengths) / len(original_word_lengths) if original_word_lengths else 0
-        overall_clean_word_avg = sum(
-            cleaned_word_lengths) / len(cleaned_word_lengths) if cleaned_word_lengths else 0
-
-        return {
-            'total_original_sentences': total_original_sentences,
-            'total_cleaned_sentences': total_cleaned_sentences,
-            'total_original_words': total_original_words,
-            'total_cleaned_words': total_cleaned_words,
-            'overall_orig_char_avg': overall_orig_char_avg,
-            'overall_clean_char_avg': overall_clean_char_avg,
-            'overall_orig_word_avg': overall_orig_word_avg,
-            'overall_clean_word_avg': overall_clean_word_avg,
-            'files_with_sentences': files_with_sentences,
-            'files_count': len(files_with_sentences)
-        }
-
-    def generate_report(self, file_stats: List[Dict], total_original: int, total_cleaned: int, output_folder: Path, failed_files: List[Dict] = None, input_folder: Path = None):
-        """Generate clean console statistics report."""
-        if not file_stats and not failed_files:
+    def generate_report(self, file_stats: Union[List[Dict], StatisticsAggregator], total_original: int, total_cleaned: int, output_folder: Path, failed_files: List[Dict] = None, input_folder: Path = None):
+        """Generate clean console statistics report from a file statistics list or a streaming aggregator."""
+        aggregator = self._as_aggregator(file_stats)
+        if not aggregator.files_processed and not failed_files:
             print("No files were processed")
             return
 
         # Print comprehensive analysis summary
         self._print_comprehensive_analysis(
-            file_stats, total_original, total_cleaned)
+            aggregator, total_original, total_cleaned)
 
         # Print detailed results table
-        self._print_detailed_results_table(file_stats)
+        self._print_detailed_results_table(aggregator)
 
         if failed_files:
             self._print_failed_files_table(failed_files)
 
-    def _print_comprehensive_analysis(self, file_stats: List[Dict], total_original: int, total_cleaned: int):
+    @staticmethod
+    def _as_aggregator(file_stats: Union[List[Dict], StatisticsAggregator]) -> StatisticsAggregator:
+        if isinstance(file_stats, StatisticsAggregator):
+            return file_stats
+        file_stats = file_stats or []
+        # An in-memory list is already bounded by the caller: show every row
+        return StatisticsAggregator.from_file_stats(file_stats, max_table_rows=max(len(file_stats), 1))
+
+    def _print_comprehensive_analysis(self, aggregator: StatisticsAggregator, total_original: int, total_cleaned: int):
         """Print comprehensive analysis matching the user's screenshot format."""
-        if not file_stats:
+        if not aggregator.files_processed:
             return
 
         overall_reduction = ((total_original - total_cleaned) /
                              total_original * 100) if total_original > 0 else 0
-        sentence_stats = self._extract_sentence_statistics(file_stats)
+        sentence_stats = aggregator.sentence_statistics()
 
-        # Calculate reduction statistics
-        reductions = [stat['reduction_percent'] for stat in file_stats]
-        avg_reduction = sum(reductions) / len(reductions) if reductions else 0
-        max_reduction = max(reductions) if reductions else 0
-        min_reduction = min(reductions) if reductions else 0
+        # Reduction statistics
+        avg_reduction = aggregator.average_reduction
+        max_reduction = aggregator.reduction_max
+        min_reduction = aggregator.reduction_min
 
         print(f"\n{'='*70}")
         print("PROCESSING ANALYSIS SUMMARY")
@@ -134,7 +203,7 @@ class StatisticsReporter:
 
         # FILES & CHARACTERS section
         print(f"\nFILES & CHARACTERS:")
-        print(f"   Files Processed: {len(file_stats)}")
+        print(f"   Files Processed: {aggregator.files_processed}")
         print(
             f"   Total Characters: {total_original:,} → {total_cleaned:,} ({overall_reduction:.1f}%)")
         print(
@@ -157,35 +226,31 @@ class StatisticsReporter:
             print(
                 f"   Avg Words/Sentence: {sentence_stats['overall_orig_word_avg']:.1f} → {sentence_stats['overall_clean_word_avg']:.1f}")
 
-    def _print_detailed_results_table(self, file_stats: List[Dict]):
-        """Print detailed results table for each file."""
-        if not file_stats:
+    def _print_detailed_results_table(self, aggregator: StatisticsAggregator):
+        """Print detailed results table for the files with the largest reduction."""
+        if not aggregator.files_processed:
             return
 
         print(f"\n{'='*100}")
         print(f"DETAILED RESULTS")
         print(f"{'='*100}")
+        if aggregator.files_processed > aggregator.max_table_rows:
+            print(f"Top {aggregator.max_table_rows} of {aggregator.files_processed} files by reduction")
+        if aggregator.details_path:
+            print(f"Per-file details: {aggregator.details_path}")
 
         # All files table - clean and organized
         print(f"{'#':<3} {'Filename':<40} {'Original':<12} {'Cleaned':<12} {'Reduction':<10} {'Sentences':<12}")
         print(f"{'-'*3} {'-'*40} {'-'*12} {'-'*12} {'-'*10} {'-'*12}")
 
-        # Sort by reduction percentage for better insights
-        sorted_stats = sorted(
-            file_stats, key=lambda x: x['reduction_percent'], reverse=True)
-
-        for i, stat in enumerate(sorted_stats, 1):
-            filename = stat['filename'][:37] + \
-                "..." if len(stat['filename']) > 40 else stat['filename']
-
-            # Extract sentence info if available
-            detailed_stats = stat.get('detailed_stats', {})
-            orig_sentences = detailed_stats.get('original_sentences', 0)
-            clean_sentences = detailed_stats.get('cleaned_sentences', 0)
+        # Sorted by reduction percentage for better insights
+        for i, row in enumerate(aggregator.top_rows(), 1):
+            name, original_length, cleaned_length, reduction, orig_sentences, clean_sentences = row
+            filename = name[:37] + "..." if len(name) > 40 else name
             sentence_info = f"{orig_sentences}→{clean_sentences}" if orig_sentences > 0 else "N/A"
 
-            print(f"{i:<3} {filename:<40} {stat['original_length']:>12,} {stat['cleaned_length']:>12,} "
-                  f"{stat['reduction_percent']:>9.1f}% {sentence_info:<12}")
+            print(f"{i:<3} {filename:<40} {original_length:>12,} {cleaned_length:>12,} "
+                  f"{reduction:>9.1f}% {sentence_info:<12}")
 
     def _print_failed_files_table(self, failed_files: List[Dict]):
         """Print failed files table."""
@@ -203,13 +268,13 @@ class StatisticsReporter:
                 "..." if len(failed['error']) > 25 else failed['error']
             print(f"{i:<3} {filename:<40} {error:<25}")
 
-    def _print_sentence_statistics_table(self, file_stats: List[Dict]):
+    def _print_sentence_statistics_table(self, aggregator: StatisticsAggregator):
         """Print sentence and word statistics in tabular format."""
-        if not file_stats:
+        if not aggregator.files_processed:
             return
 
         # Extract sentence statistics
-        sentence_stats = self._extract_sentence_statistics(file_stats)
+        sentence_stats = aggregator.sentence_statistics()
 
         if sentence_stats['files_count'] == 0:
             print(f"\n{'='*70}")
@@ -249,7 +314,29 @@ class StatisticsReporter:
         print(
             f"{'Avg Words/Sentence':<30} {sentence_stats['overall_orig_word_avg']:>15.1f} {sentence_stats['overall_clean_word_avg']:>15.1f} {words_per_sent_change:>14.1f}%")
 
-    def generate_detailed_report(self, file_stats: List[Dict], total_original: int, total_cleaned: int, show_chart: bool = True):
+    def generate_detailed_report(self, file_stats: Union[List[Dict], StatisticsAggregator], total_original: int, total_cleaned: int, show_chart: bool = True):
         """Generate detailed statistics report in console format."""
-        # Only show console tables - no charts
-        self._print_sentence_statistics_table(file_stats)
+        aggregator = self._as_aggregator(file_stats)
+        self._print_sentence_statistics_table(aggregator)
+
+        if show_chart and aggregator.files_processed:
+            self._print_histogram("REDUCTION DISTRIBUTION (% of characters removed)",
+                                  aggregator.REDUCTION_BINS, aggregator.reduction_histogram)
+            self._print_histogram("CLEANED CHARS/SENTENCE DISTRIBUTION",
+                                  aggregator.SENTENCE_LENGTH_BINS, aggregator.sentence_length_histogram)
+
+    @staticmethod
+    def _print_histogram(title: str, edges, counts, width: int = 40):
+        """Print a console bar chart of a histogram, skipping empty leading/trailing buckets."""
+        nonzero = np.flatnonzero(counts)
+        if not len(nonzero):
+            return
+
+        print(f"\n{'='*70}")
+        print(title)
+        print(f"{'='*70}")
+        peak = counts.max()
+        for i in range(nonzero[0], nonzero[-1] + 1):
+            bar = '#' * int(round(counts[i] / peak * width))
+            label = f"{edges[i]:g}-{edges[i + 1]:g}"
+            print(f"{label:>10} | {bar:<{width}} {counts[i]:,}")
@@ -1,5 +1,6 @@
 """Main text cleaning functionality."""
 
+import logging
 import re
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -160,16 +161,19 @@ class TextCleaner(LoggerMixin):
             return text
 
         words = text.split()
-        filtered_words = []
+        if not words:
+            return text
 
-        for word in words:
-            # Clean word for comparison (remove punctuation at start/end)
-            clean_word = re.sub(
-                rf'^[{self.config.PUNCTUATION}]+|[{self.config.PUNCTUATION}]+$', '', word)
+        # Strip punctuation at start/end of every word in one pass
+        clean_words = self.config.word_core_lines_pattern.findall('\n'.join(words))
+        # Look up each distinct word once
+        known_words = {w for w in set(clean_words) if w and self.dictionary.contains(w)}
+        filtered_words = []
 
+        for word, clean_word in zip(words, clean_words):
             # Keep word if it's in dictionary, is punctuation only, or is empty after cleaning
             if (not clean_word or
-                self.dictionary.contains(clean_word) or
+                clean_word in known_words or
                     self.config.punctuation_only_pattern.match(word)):
                 filtered_words.append(word)
             else:
@@ -189,14 +193,17 @@ class TextCleaner(LoggerMixin):
 
     def _filter_valid_tokens(self, tokens: List[str]) -> List[str]:
         """Filter tokens to keep only valid Vietnamese words and punctuation."""
-        valid_tokens = []
-
-        for token in tokens:
-            if self._is_valid_token(token):
-                valid_tokens.append(token)
-            else:
-                self._stats['invalid_tokens_removed'] += 1
-                self.logger.debug("Filtered out invalid token: %s", token)
+        # Tokens never contain whitespace, so one findall over the newline-joined
+        # tokens validates all of them (pattern and length) in a single scan.
+        valid_tokens = self.config.valid_token_lines_pattern.findall('\n'.join(tokens))
+        removed = len(tokens) - len(valid_tokens)
+        if removed:
+            self._stats['invalid_tokens_removed'] += removed
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for token in tokens:
+                if not self._is_valid_token(token):
+                    self.logger.debug("Filtered out invalid token: %s", token)
 
         self.logger.info("Kept %d valid tokens", len(valid_tokens))
         return valid_tokens
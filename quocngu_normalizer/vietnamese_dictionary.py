@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+from quocngu_normalizer.compiled_word_list import CompiledWordList
 from quocngu_normalizer.exceptions import DictionaryError
 
 
@@ -12,7 +13,7 @@ class VietnameseDictionary:
     """Manages Vietnamese dictionary for word validation."""
 
     def __init__(self, dict_path: Optional[Path] = None, case_sensitive: bool = False):
-        self.words: Set[str] = set()
+        self.words = CompiledWordList.from_words((), case_sensitive)
         self.case_sensitive = case_sensitive
         self.logger = logging.getLogger(
             f"{__name__}.{self.__class__.__name__}")
@@ -21,23 +22,49 @@ class VietnameseDictionary:
             self.load_dictionary(dict_path)
 
     def load_dictionary(self, dict_path: Path) -> None:
-        """Load Vietnamese dictionary from JSON file."""
+        """Load Vietnamese dictionary, using the compiled word list when it is up to date."""
         if not dict_path.exists():
             self.logger.warning("Dictionary file not found: %s", dict_path)
             return
 
+        compiled_path = self.compiled_path(dict_path, self.case_sensitive)
+        is_fresh = CompiledWordList.is_fresh(compiled_path, dict_path, self.case_sensitive)
+        if is_fresh or self._compile_dictionary(dict_path, compiled_path):
+            try:
+                self.words = CompiledWordList.open(compiled_path)
+            except (OSError, ValueError) as e:
+                raise DictionaryError(
+                    f"Failed to open compiled dictionary {compiled_path}: {e}")
+
+        self.logger.info(
+            "Loaded %d Vietnamese words from dictionary", len(self.words))
+
+    @staticmethod
+    def compiled_path(dict_path: Path, case_sensitive: bool = False) -> Path:
+        """Location of the compiled word list next to the JSON dictionary."""
+        suffix = '.cased.wordlist' if case_sensitive else '.wordlist'
+        return dict_path.with_name(dict_path.stem + suffix)
+
+    def _compile_dictionary(self, dict_path: Path, compiled_path: Path) -> bool:
+        """Parse the JSON dictionary and (re)build its compiled word list, return True if written."""
         try:
             with dict_path.open('r', encoding='utf-8') as f:
                 dictionary_data = json.load(f)
-
-            self.words = self._extract_words(dictionary_data)
-            self.logger.info(
-                "Loaded %d Vietnamese words from dictionary", len(self.words))
-
         except (json.JSONDecodeError, IOError) as e:
             raise DictionaryError(
                 f"Failed to load dictionary from {dict_path}: {e}")
 
+        words = self._extract_words(dictionary_data)
+        try:
+            CompiledWordList.write(compiled_path, words, dict_path, self.case_sensitive)
+            self.logger.info("Compiled dictionary to %s", compiled_path)
+            return True
+        except DictionaryError as e:
+            # Read-only location: keep an in-memory word list for this process
+            self.logger.warning("%s", e)
+            self.words = CompiledWordList.from_words(words, self.case_sensitive)
+            return False
+
     def _extract_words(self, dictionary_data: List[Dict]) -> Set[str]:
         """Extract Vietnamese words from dictionary data."""
         words = set()
@@ -55,8 +82,15 @@ class VietnameseDictionary:
         if not self.words:
             return True  # If no dictionary loaded, accept all words
 
-        check_word = word if self.case_sensitive else word.lower()
-        return check_word in self.words
+        return word in self.words
+
+    def words_with_prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Return dictionary words starting with prefix, in sorted order."""
+        return list(self.words.with_prefix(prefix, limit))
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Check if any dictionary word starts with prefix."""
+        return self.words.has_prefix(prefix)
 
     def filter_words(self, words: List[str]) -> Tuple[List[str], int]:
         """Filter words based on dictionary, return filtered words and removal count."""